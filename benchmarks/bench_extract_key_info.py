@@ -0,0 +1,120 @@
+"""Micro-benchmark for Summarizer._extract_key_info.
+
+Compares the single-pass keyword engine against the previous per-keyword
+implementation on a synthetic conversation, checks that both produce the
+same key information, and prints the time per message.
+
+    python -m benchmarks.bench_extract_key_info --messages 2000
+"""
+import re
+import time
+import random
+import argparse
+import nltk
+from nltk.tokenize import word_tokenize
+from services.summarizer import Summarizer, WELL_WORDS, ATTEND_WORDS
+
+VOCABULARY = [
+    "hi", "hello", "hey", "good", "morning", "meet", "meeting", "dinner", "lunch", "coffee",
+    "at", "the", "blue", "cafe", "restaurant", "7pm", "10:30", "tomorrow", "project", "report",
+    "finished", "done", "still", "working", "send", "going", "coming", "joining", "not", "yet",
+    "how", "what", "when", "where", "why", "?", "is", "it", "ready", "nice", "fine", "worried",
+    "which", "place", "called", "sunrise", "location", "deadline", "team", "review"
+]
+
+def make_messages(count: int, seed: int = 42):
+    """Build a reproducible synthetic two-person conversation"""
+    rng = random.Random(seed)
+    return [
+        {
+            "user_id": f"user{i % 2}",
+            "message": " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(4, 20)))
+        }
+        for i in range(count)
+    ]
+
+def legacy_extract_key_info(summarizer: Summarizer, messages):
+    """The per-keyword implementation the single-pass engine replaced"""
+    info = Summarizer._new_key_info()
+    meeting_keywords = {'meet', 'meeting', 'dinner', 'lunch', 'coffee', 'restaurant', 'cafe', 'time', 'place', 'location'}
+    action_keywords = {'working', 'finish', 'complete', 'send', 'submit', 'prepare', 'do', 'manage', 'going', 'coming', 'joining'}
+    status_keywords = {'done', 'finished', 'completed', 'ready', 'not yet', 'still', 'worried', 'better', 'good', 'fine', 'nice'}
+    greeting_keywords = {'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'}
+
+    for msg in messages:
+        user_id = msg['user_id']
+        text = msg['message'].lower()
+        words = set(word_tokenize(text))
+        info['participants'].add(user_id)
+        if any(keyword in text for keyword in greeting_keywords):
+            name_match = re.search(r'hi\s+(\w+)|hello\s+(\w+)|hey\s+(\w+)', text)
+            if name_match:
+                name = name_match.group(1) or name_match.group(2) or name_match.group(3)
+                info['names'][user_id] = name.capitalize()
+            info['greeted'] = True
+        if any(keyword in text for keyword in meeting_keywords):
+            time_match = re.search(r'(\d{1,2}(?::\d{2})?\s*(?:am|pm|AM|PM)?)', text)
+            place_patterns = [
+                r'(?:at|in)\s+([a-zA-Z\s]+(?:cafe|restaurant|place|location))',
+                r'(?:named|called)\s+([a-zA-Z\s]+(?:cafe|restaurant|place|location))',
+                r'([a-zA-Z\s]+(?:cafe|restaurant|place|location))\s+(?:at|in)'
+            ]
+            place = None
+            for pattern in place_patterns:
+                place_match = re.search(pattern, text)
+                if place_match:
+                    place = place_match.group(1).strip()
+                    break
+            time_value = time_match.group(1) if time_match else None
+            info['meeting'] = {'user_id': user_id, 'time': time_value, 'place': place}
+        if any(keyword in text for keyword in action_keywords):
+            Summarizer._add_first(info['action_users'], user_id, text, ATTEND_WORDS)
+        if any(keyword in text for keyword in status_keywords):
+            Summarizer._add_first(info['status_users'], user_id, text, WELL_WORDS)
+        tokens = nltk.pos_tag(word_tokenize(text))
+        nouns = [word for word, pos in tokens if pos.startswith('NN') and word not in summarizer.stop_words]
+        info['topics'].update(nouns)
+    return info
+
+def best_of(fn, repeat: int) -> float:
+    """Return the fastest of ``repeat`` timed runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    summarizer = Summarizer()
+    messages = make_messages(args.messages)
+
+    if legacy_extract_key_info(summarizer, messages) != summarizer._extract_key_info(messages):
+        raise SystemExit("Outputs differ between the legacy and single-pass implementations")
+
+    legacy = best_of(lambda: legacy_extract_key_info(summarizer, messages), args.repeat)
+    current = best_of(lambda: summarizer._extract_key_info(messages), args.repeat)
+    classify_legacy = best_of(lambda: [
+        [any(k in m["message"] for k in kws) for kws in (
+            {'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'},
+            {'meet', 'meeting', 'dinner', 'lunch', 'coffee', 'restaurant', 'cafe', 'time', 'place', 'location'},
+            {'working', 'finish', 'complete', 'send', 'submit', 'prepare', 'do', 'manage', 'going', 'coming', 'joining'},
+            {'done', 'finished', 'completed', 'ready', 'not yet', 'still', 'worried', 'better', 'good', 'fine', 'nice'}
+        )] for m in messages
+    ], args.repeat)
+    classify_current = best_of(lambda: [summarizer._classify(m["message"]) for m in messages], args.repeat)
+
+    per_message = lambda seconds: seconds / len(messages) * 1e6
+    print(f"messages:            {len(messages)}")
+    print(f"legacy extract:      {per_message(legacy):8.1f} us/message")
+    print(f"single-pass extract: {per_message(current):8.1f} us/message  ({legacy / current:.2f}x)")
+    print(f"legacy classify:     {per_message(classify_legacy):8.1f} us/message")
+    print(f"single-pass classify:{per_message(classify_current):8.1f} us/message  ({classify_legacy / classify_current:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""pytest-benchmark micro-benchmarks for Summarizer._extract_key_info.
+
+Times key information extraction over synthetic conversations of 10 to
+100k messages (BENCH_SIZES overrides the sizes, comma separated). Save the
+results as JSON to compare releases:
+
+    pytest benchmarks/bench_summarizer.py --benchmark-json=results/summarizer.json
+    pytest-benchmark compare results/old.json results/summarizer.json
+"""
+import os
+import pytest
+from services.summarizer import Summarizer
+from benchmarks.bench_extract_key_info import make_messages
+
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "10,100,1000,10000,100000").split(",")]
+
+# Conversations at least this long are timed over a single round
+LARGE_CONVERSATION = 10000
+
+@pytest.fixture(scope="module")
+def summarizer():
+    summarizer = Summarizer()
+    summarizer.warmup()
+    return summarizer
+
+@pytest.mark.parametrize("size", SIZES)
+def test_extract_key_info(benchmark, summarizer, size):
+    messages = make_messages(size)
+    benchmark.extra_info["messages"] = size
+    if size >= LARGE_CONVERSATION:
+        info = benchmark.pedantic(summarizer._extract_key_info, args=(messages,), rounds=1, iterations=1)
+    else:
+        info = benchmark(summarizer._extract_key_info, messages)
+    assert info["participants"] == {"user0", "user1"} or size < 2
+
+@pytest.mark.parametrize("size", [size for size in SIZES if size <= LARGE_CONVERSATION])
+def test_generate_narrative_summary(benchmark, summarizer, size):
+    info = summarizer._extract_key_info(make_messages(size))
+    benchmark.extra_info["messages"] = size
+    summary = benchmark(summarizer._generate_narrative_summary, info)
+    assert summary
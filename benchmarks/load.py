@@ -0,0 +1,192 @@
+"""In-process load generator for the Chat API.
+
+Drives the FastAPI app through httpx's ASGI transport against the in-memory
+or a scratch SQLite storage backend (--backend), and reports latency
+percentiles and throughput for each scenario. Results are written as JSON so
+runs can be diffed between releases.
+
+    python -m benchmarks.load --requests 2000 --concurrency 32 --output results/load.json
+"""
+import os
+import sys
+import math
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+import logging
+from config.database import Database, utc_now
+from config.storage import StorageBackend, create_backend
+from main import app
+from routes.summary_routes import summarizer
+from benchmarks.bench_extract_key_info import make_messages
+
+SCENARIOS = ["create", "read", "history", "summarize"]
+BACKENDS = ["memory", "sqlite"]
+
+def open_backend(name: str, directory: str) -> StorageBackend:
+    """Build a storage backend whose data lives only for this run"""
+    if name == "sqlite":
+        from config.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(os.path.join(directory, "load.db"))
+    return create_backend(name)
+
+async def seed(conversations: int, messages_per_conversation: int, users: int) -> None:
+    """Store synthetic conversations to read and summarize"""
+    texts = make_messages(conversations * messages_per_conversation)
+    docs = [
+        {
+            "user_id": f"user{i % users}",
+            "message": text["message"],
+            "conversation_id": f"conv{i // messages_per_conversation}",
+            "timestamp": utc_now()
+        }
+        for i, text in enumerate(texts)
+    ]
+    await Database.store_messages(docs)
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    return samples[max(0, math.ceil(fraction * len(samples)) - 1)]
+
+def summarize_samples(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    """Latency percentiles (milliseconds) and throughput for one scenario"""
+    samples = sorted(latencies)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": len(samples) / wall if wall else 0.0,
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 0.50) * 1000 if samples else 0.0,
+        "p95_ms": percentile(samples, 0.95) * 1000 if samples else 0.0,
+        "p99_ms": percentile(samples, 0.99) * 1000 if samples else 0.0,
+        "max_ms": samples[-1] * 1000 if samples else 0.0,
+        "wall_seconds": wall,
+    }
+
+async def run_scenario(
+    request: Callable[[int], Awaitable[httpx.Response]],
+    total: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """Issue ``total`` requests from ``concurrency`` workers and time each one"""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            response = await request(index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize_samples(latencies, errors, time.perf_counter() - start)
+
+def git_revision() -> str:
+    """Current commit, to tell result files apart"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    # Keep per-request logging out of the measurements
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        await Database.use_backend(open_backend(args.backend, directory))
+        try:
+            results = await run_scenarios(args)
+        finally:
+            await Database.close_db()
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "scenarios": results,
+    }
+
+async def run_scenarios(args: argparse.Namespace) -> Dict[str, Any]:
+    """Seed the database, then run each selected scenario in turn"""
+    # Only the summarize scenario needs NLTK data
+    if "summarize" in args.scenarios:
+        summarizer.warmup()
+    await seed(args.conversations, args.messages, args.users)
+    rng = random.Random(args.seed)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        requests = {
+            "create": lambda i: client.post("/api/v1/chats", json={
+                "user_id": f"user{i % args.users}",
+                "message": f"load test message {i}",
+                "conversation_id": f"conv{rng.randrange(args.conversations)}"
+            }),
+            "read": lambda i: client.get(
+                f"/api/v1/chats/conv{rng.randrange(args.conversations)}", params={"limit": args.page_size}
+            ),
+            "history": lambda i: client.get(f"/api/v1/users/user{rng.randrange(args.users)}/chats"),
+            "summarize": lambda i: client.post("/api/v1/summarize", json={
+                "conversation_id": f"conv{rng.randrange(args.conversations)}"
+            }),
+        }
+        results = {}
+        for name in args.scenarios:
+            total = args.summarize_requests if name == "summarize" else args.requests
+            results[name] = await run_scenario(requests[name], total, args.concurrency)
+    return results
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    parser.add_argument("--summarize-requests", type=int, default=200, help="Requests for the summarize scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests")
+    parser.add_argument("--conversations", type=int, default=50, help="Seeded conversations")
+    parser.add_argument("--messages", type=int, default=100, help="Seeded messages per conversation")
+    parser.add_argument("--users", type=int, default=10, help="Distinct users in seeded data")
+    parser.add_argument("--page-size", type=int, default=100, help="Messages per read request")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--backend", choices=BACKENDS, default="memory", help="Storage backend to run against")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    report = asyncio.run(main(args))
+
+    print(f"{'scenario':<10} {'requests':>8} {'errors':>6} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, result in report["scenarios"].items():
+        print(
+            f"{name:<10} {result['requests']:>8} {result['errors']:>6} {result['throughput_rps']:>9.1f} "
+            f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        )
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -2,7 +2,7 @@ import asyncio
 import logging
 import signal
 from datetime import datetime
-from config.database import Database
+from config.database import Database, utc_now
 from services.summarizer import Summarizer
 
 # Set up basic logging
@@ -82,7 +82,10 @@ async def main():
                         
                 elif message.lower() == 'history':
                     try:
-                        messages = await Database.get_conversation(conversation_id)
+                        messages = await Database.get_conversation(
+                            conversation_id,
+                            fields=["user_id", "message", "timestamp"]
+                        )
                         print("\n" + "="*50)
                         print("📜 Conversation History")
                         print("="*50)
@@ -104,7 +107,7 @@ async def main():
                             "user_id": user_id,
                             "message": message,
                             "conversation_id": conversation_id,
-                            "timestamp": datetime.now()
+                            "timestamp": utc_now()
                         }
                         await Database.store_message(message_data)
                         print("✅ Message sent and stored successfully!")
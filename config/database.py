@@ -1,9 +1,16 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import WriteError
+from bson import ObjectId
+from bson.errors import InvalidId
 from dotenv import load_dotenv
+from contextlib import aclosing
 import os
+import json
+import base64
+import binascii
 import logging
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timezone, tzinfo
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator, Callable
+from config.metrics import timed_operation
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -12,75 +19,177 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# MongoDB Configuration
-MONGODB_URL = os.getenv("MONGODB_URL")
-if not MONGODB_URL:
-    raise ValueError("MONGODB_URL environment variable is not set")
+# Storage behind Database: "mongo", "memory" or "sqlite" (see config/storage.py)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+
+# Pagination limits for conversation history
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Documents sent per insert_many call during bulk ingestion
+BULK_CHUNK_SIZE = int(os.getenv("MONGODB_BULK_CHUNK_SIZE", "1000"))
+
+# Search backend: "text" uses a MongoDB text index, "memory" an in-process inverted index
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "text")
+
+
+class UnsupportedByBackend(Exception):
+    """Raised when the storage backend lacks an optional capability, such as stats"""
+
+
+def encode_cursor(message: Dict[str, Any], field: str = "timestamp") -> str:
+    """Encode a document's (field, _id) sort key into an opaque cursor"""
+    timestamp = message.get(field)
+    if isinstance(timestamp, datetime):
+        key = {"t": timestamp.isoformat(), "k": "d"}
+    else:
+        key = {"t": timestamp, "k": "s"}
+    key["id"] = str(message["_id"])
+    if not isinstance(message["_id"], ObjectId):
+        key["ik"] = "s"
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Decode a cursor produced by encode_cursor back into (sort value, _id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        timestamp = key["t"]
+        if key.get("k") == "d":
+            timestamp = datetime.fromisoformat(timestamp)
+        if key.get("ik") == "s":
+            return timestamp, key["id"]
+        return timestamp, ObjectId(key["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid pagination cursor")
+
+def page_cursors(
+    messages: List[Dict[str, Any]],
+    limit: int,
+    after: Optional[str],
+    before: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[str]]:
+    """Turn up to limit + 1 messages read in scan order into (page, next cursor, prev cursor)"""
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if before:
+        messages.reverse()
+
+    next_cursor = prev_cursor = None
+    if messages:
+        if before:
+            next_cursor = encode_cursor(messages[-1])
+            prev_cursor = encode_cursor(messages[0]) if has_more else None
+        else:
+            next_cursor = encode_cursor(messages[-1]) if has_more else None
+            prev_cursor = encode_cursor(messages[0]) if after else None
+    return messages, next_cursor, prev_cursor
+
+def utc_now() -> datetime:
+    """Current time as a naive UTC datetime at MongoDB's millisecond precision"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Convert an aware datetime to the naive UTC form MongoDB returns"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
-DATABASE_NAME = os.getenv("MONGODB_DB", "chat_db")
-MESSAGES_COLLECTION = "messages"
 
 class Database:
-    client: Optional[AsyncIOMotorClient] = None
-    db = None
+    # Storage every operation is served from (see config/storage.py), opened by connect_db
+    backend = None
+    # Callbacks run with a conversation id whenever its messages change
+    change_listeners: List[Callable[[str], None]] = []
+    # Callbacks run with each newly stored message document
+    message_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    @classmethod
+    def add_change_listener(cls, listener: Callable[[str], None]) -> None:
+        """Register a callback for conversation writes and deletes"""
+        if listener not in cls.change_listeners:
+            cls.change_listeners.append(listener)
+
+    @classmethod
+    def _notify_change(cls, conversation_id: str) -> None:
+        """Run change listeners, never letting one fail the write"""
+        for listener in cls.change_listeners:
+            try:
+                listener(conversation_id)
+            except Exception as e:
+                logger.error(f"❌ Change listener failed: {str(e)}")
+
+    @classmethod
+    def add_message_listener(cls, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Register a callback for each newly stored message"""
+        if listener not in cls.message_listeners:
+            cls.message_listeners.append(listener)
+
+    @classmethod
+    def remove_message_listener(cls, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Unregister a message callback"""
+        if listener in cls.message_listeners:
+            cls.message_listeners.remove(listener)
+
+    @classmethod
+    def _notify_messages(cls, messages: List[Dict[str, Any]]) -> None:
+        """Run message listeners, never letting one fail the write"""
+        for listener in cls.message_listeners:
+            for message in messages:
+                try:
+                    listener(message)
+                except Exception as e:
+                    logger.error(f"❌ Message listener failed: {str(e)}")
 
     @classmethod
+    @timed_operation
     async def connect_db(cls) -> None:
-        """Connect to MongoDB"""
-        try:
-            logger.info("Connecting to MongoDB Atlas")
-            
-            # Configure MongoDB client with basic settings
-            cls.client = AsyncIOMotorClient(
-                MONGODB_URL,
-                serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=5000,
-                maxPoolSize=50,
-                minPoolSize=0,
-                tls=True,
-                tlsAllowInvalidCertificates=True
-            )
-            
-            logger.info("Client created, attempting to access database...")
-            cls.db = cls.client[DATABASE_NAME]
-            
-            # Verify connection with a simple command
-            logger.info("Verifying connection with ping command...")
-            await cls.client.admin.command('ping')
-            logger.info("✅ Successfully connected to MongoDB Atlas!")
-            
-            # Create indexes
-            logger.info("Creating database indexes...")
-            collection = cls.db[MESSAGES_COLLECTION]
-            await collection.create_index("user_id")
-            await collection.create_index("conversation_id")
-            logger.info("✅ Database indexes created")
-            
-        except Exception as e:
-            logger.error(f"❌ MongoDB Connection Error: {str(e)}")
-            if cls.client:
-                cls.client.close()
-                cls.client = None
-                cls.db = None
-            raise
+        """Open the storage backend selected by STORAGE_BACKEND"""
+        from config.storage import create_backend
+        await cls.use_backend(create_backend(STORAGE_BACKEND))
 
     @classmethod
+    @timed_operation
     async def close_db(cls) -> None:
-        """Close MongoDB connection"""
-        if cls.client:
-            cls.client.close()
-            cls.client = None
-            cls.db = None
-            logger.info("Closed MongoDB connection")
+        """Close the storage backend"""
+        if cls.backend is not None:
+            await cls.backend.close()
+            cls.backend = None
+            logger.info("Closed storage backend")
 
     @classmethod
-    async def get_messages_collection(cls):
-        """Get messages collection"""
-        if cls.db is None:
+    async def use_backend(cls, backend) -> None:
+        """Serve storage from ``backend``"""
+        await backend.connect()
+        cls.backend = backend
+
+    @classmethod
+    async def get_backend(cls):
+        """Get the storage backend, connecting on first use"""
+        if cls.backend is None:
             await cls.connect_db()
-        return cls.db[MESSAGES_COLLECTION]
+        return cls.backend
 
     @classmethod
+    def supports(cls, capability: str) -> bool:
+        """Whether the open backend implements an optional capability, e.g. "watch_messages" """
+        return cls.backend is not None and hasattr(cls.backend, capability)
+
+    @classmethod
+    async def _capability(cls, name: str) -> Callable:
+        """Get an optional backend method, raising UnsupportedByBackend if it is missing"""
+        backend = await cls.get_backend()
+        method = getattr(backend, name, None)
+        if method is None:
+            raise UnsupportedByBackend(f"{name} is not supported by the {type(backend).__name__} storage backend")
+        return method
+
+    @classmethod
+    @timed_operation
     async def store_message(cls, message_data: Dict[str, Any]) -> str:
         """Store a new message"""
         try:
@@ -90,31 +199,86 @@ class Database:
             if missing_fields:
                 raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
 
-            collection = await cls.get_messages_collection()
-            result = await collection.insert_one(message_data)
-            logger.info(f"✅ Message stored with ID: {result.inserted_id}")
-            return str(result.inserted_id)
+            backend = await cls.get_backend()
+            inserted_id = message_data.setdefault("_id", ObjectId())
+            errors = await backend.insert_messages([message_data])
+            if errors:
+                raise WriteError(errors[0])
+            logger.info(f"✅ Message stored with ID: {inserted_id}")
+            cls._notify_change(message_data["conversation_id"])
+            cls._notify_messages([message_data])
+            return str(inserted_id)
         except Exception as e:
             logger.error(f"❌ Error storing message: {str(e)}")
             raise
 
     @classmethod
-    async def get_conversation(cls, conversation_id: str) -> List[Dict[str, Any]]:
-        """Get messages for a specific conversation"""
+    @timed_operation
+    async def store_messages(
+        cls,
+        messages: List[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Store many messages, ``chunk_size`` per backend write.
+
+        Returns one ``(inserted_id, error)`` pair per input message, in order.
+        A failed document does not stop the rest of its chunk from being written.
+        """
+        try:
+            if chunk_size < 1:
+                raise ValueError("Chunk size must be at least 1")
+
+            # Validate required fields
+            required_fields = ["user_id", "message", "conversation_id", "timestamp"]
+            for i, message_data in enumerate(messages):
+                missing_fields = [field for field in required_fields if field not in message_data]
+                if missing_fields:
+                    raise ValueError(f"Message {i} is missing required fields: {', '.join(missing_fields)}")
+
+            backend = await cls.get_backend()
+            results: List[Tuple[Optional[str], Optional[str]]] = []
+            for start in range(0, len(messages), chunk_size):
+                chunk = messages[start:start + chunk_size]
+                for doc in chunk:
+                    doc.setdefault("_id", ObjectId())
+                errors = await backend.insert_messages(chunk)
+                for i, doc in enumerate(chunk):
+                    if i in errors:
+                        results.append((None, errors[i]))
+                    else:
+                        results.append((str(doc["_id"]), None))
+                cls._notify_messages([doc for i, doc in enumerate(chunk) if i not in errors])
+
+            for conversation_id in {msg["conversation_id"] for msg in messages}:
+                cls._notify_change(conversation_id)
+
+            failed = sum(1 for _, error in results if error)
+            logger.info(f"✅ Bulk stored {len(results) - failed} messages ({failed} failed)")
+            return results
+        except Exception as e:
+            logger.error(f"❌ Error bulk storing messages: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_conversation(
+        cls,
+        conversation_id: str,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get messages for a specific conversation.
+
+        ``fields`` limits the returned fields (``_id`` is always included).
+        Timestamps are returned as stored; they are rendered as strings only
+        when serialized.
+        """
         try:
             # Validate conversation ID
             if not conversation_id:
                 raise ValueError("Conversation ID cannot be empty")
 
-            collection = await cls.get_messages_collection()
-            cursor = collection.find({"conversation_id": conversation_id})
-            messages = await cursor.to_list(length=None)
-            
-            # Convert datetime objects to ISO format strings
-            for msg in messages:
-                if isinstance(msg.get("timestamp"), datetime):
-                    msg["timestamp"] = msg["timestamp"].isoformat()
-                    
+            backend = await cls.get_backend()
+            messages = await backend.get_conversation(conversation_id, fields)
             logger.info(f"✅ Retrieved {len(messages)} messages for conversation {conversation_id}")
             return messages
         except Exception as e:
@@ -122,22 +286,139 @@ class Database:
             raise
 
     @classmethod
-    async def get_user_messages(cls, user_id: str) -> List[Dict[str, Any]]:
-        """Get all messages for a specific user"""
+    @timed_operation
+    async def get_conversation_page(
+        cls,
+        conversation_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        direction: str = "asc",
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[str]]:
+        """Get one page of a conversation ordered by (timestamp, _id).
+
+        ``after`` continues past a cursor in the requested direction and
+        ``before`` walks back towards the start. Returns the page together
+        with the cursors for the next and previous pages (None at either end).
+        ``fields`` limits the returned fields; the timestamp is always
+        fetched because cursors are built from it. ``since``/``until``
+        restrict the page to since <= timestamp < until.
+        """
+        try:
+            # Validate arguments
+            if not conversation_id:
+                raise ValueError("Conversation ID cannot be empty")
+            if after and before:
+                raise ValueError("Only one of 'after' and 'before' may be given")
+            if direction not in ("asc", "desc"):
+                raise ValueError("Direction must be 'asc' or 'desc'")
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+            if fields is not None and "timestamp" not in fields:
+                fields = list(fields) + ["timestamp"]
+
+            backend = await cls.get_backend()
+            messages, next_cursor, prev_cursor = await backend.get_conversation_page(
+                conversation_id, limit, after, before, direction, fields, since, until
+            )
+            logger.info(f"✅ Retrieved page of {len(messages)} messages for conversation {conversation_id}")
+            return messages, next_cursor, prev_cursor
+        except Exception as e:
+            logger.error(f"❌ Error getting conversation page: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_messages_after(
+        cls,
+        conversation_id: str,
+        after_id: Optional[ObjectId] = None,
+        overlap_seconds: float = 0,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a conversation's messages with an _id past ``after_id``, in _id order.
+
+        ObjectIds are generated client-side, so ids minted by different
+        workers are only ordered to within clock skew. ``overlap_seconds``
+        widens the read to start that much before ``after_id``; callers are
+        expected to skip the ids they have already seen. ``fields`` behaves
+        as in get_conversation.
+        """
+        try:
+            # Validate conversation ID
+            if not conversation_id:
+                raise ValueError("Conversation ID cannot be empty")
+
+            backend = await cls.get_backend()
+            messages = await backend.get_messages_after(conversation_id, after_id, overlap_seconds, fields)
+            logger.info(f"✅ Retrieved {len(messages)} new messages for conversation {conversation_id}")
+            return messages
+        except Exception as e:
+            logger.error(f"❌ Error getting new conversation messages: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_conversation_version(cls, conversation_id: str) -> Optional[str]:
+        """Get the id of a conversation's newest message, or None if it is empty"""
+        try:
+            backend = await cls.get_backend()
+            return await backend.get_conversation_version(conversation_id)
+        except Exception as e:
+            logger.error(f"❌ Error getting conversation version: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_summary_state(cls, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get the stored incremental summary state for a conversation"""
+        try:
+            backend = await cls.get_backend()
+            return await backend.get_summary_state(conversation_id)
+        except Exception as e:
+            logger.error(f"❌ Error getting summary state: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def save_summary_state(cls, conversation_id: str, state: Dict[str, Any]) -> None:
+        """Replace the stored incremental summary state for a conversation"""
+        try:
+            backend = await cls.get_backend()
+            await backend.save_summary_state(conversation_id, state)
+        except Exception as e:
+            logger.error(f"❌ Error saving summary state: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_user_messages(
+        cls,
+        user_id: str,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        order: str = "asc"
+    ) -> List[Dict[str, Any]]:
+        """Get messages for a specific user ordered by (timestamp, _id).
+
+        ``since``/``until`` restrict results to since <= timestamp < until;
+        ``fields`` behaves as in get_conversation.
+        """
         try:
             # Validate user ID
             if not user_id:
                 raise ValueError("User ID cannot be empty")
 
-            collection = await cls.get_messages_collection()
-            cursor = collection.find({"user_id": user_id})
-            messages = await cursor.to_list(length=None)
-            
-            # Convert datetime objects to ISO format strings
-            for msg in messages:
-                if isinstance(msg.get("timestamp"), datetime):
-                    msg["timestamp"] = msg["timestamp"].isoformat()
-                    
+            if order not in ("asc", "desc"):
+                raise ValueError("Order must be 'asc' or 'desc'")
+
+            backend = await cls.get_backend()
+            messages = [msg async for msg in backend.iter_user_messages(user_id, fields, since, until, order)]
             logger.info(f"✅ Retrieved {len(messages)} messages for user {user_id}")
             return messages
         except Exception as e:
@@ -145,6 +426,228 @@ class Database:
             raise
 
     @classmethod
+    @timed_operation
+    async def iter_user_messages(
+        cls,
+        user_id: str,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        order: str = "asc"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a user's messages one by one, without loading them all first"""
+        # Validate arguments
+        if not user_id:
+            raise ValueError("User ID cannot be empty")
+        if order not in ("asc", "desc"):
+            raise ValueError("Order must be 'asc' or 'desc'")
+
+        backend = await cls.get_backend()
+        count = 0
+        try:
+            async with aclosing(backend.iter_user_messages(user_id, fields, since, until, order)) as messages:
+                async for msg in messages:
+                    count += 1
+                    yield msg
+            logger.info(f"✅ Streamed {count} messages for user {user_id}")
+        except Exception as e:
+            logger.error(f"❌ Error streaming user messages: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def iter_messages(
+        cls,
+        fields: Optional[List[str]] = None,
+        since_id: Optional[ObjectId] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every message in _id order, without loading them all first.
+
+        ``since_id`` restricts results to messages with _id >= since_id.
+        """
+        backend = await cls.get_backend()
+        async with aclosing(backend.iter_messages(fields, since_id)) as messages:
+            async for msg in messages:
+                yield msg
+
+    @classmethod
+    @timed_operation
+    async def iter_conversations(
+        cls,
+        conversation_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Yield (conversation_id, messages) for several conversations, in conversation_id order.
+
+        Each conversation's messages are in _id order and complete when
+        yielded, and only one conversation is held in memory at a time.
+        Conversations without messages are skipped.
+        """
+        if fields is not None and "conversation_id" not in fields:
+            fields = fields + ["conversation_id"]
+
+        backend = await cls.get_backend()
+        async with aclosing(backend.iter_conversations(conversation_ids, fields)) as conversations:
+            async for item in conversations:
+                yield item
+
+    @classmethod
+    @timed_operation
+    async def get_messages_by_ids(
+        cls,
+        message_ids: List[ObjectId],
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get messages by id, returned in the order of ``message_ids``"""
+        try:
+            backend = await cls.get_backend()
+            return await backend.get_messages_by_ids(message_ids, fields)
+        except Exception as e:
+            logger.error(f"❌ Error getting messages by id: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def search_messages(
+        cls,
+        text: str,
+        user_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Full-text search over messages, ranked by text score.
+
+        Each result carries its relevance in ``score``. Paging is by offset,
+        since text scores cannot be used as a keyset cursor.
+        """
+        try:
+            # Validate arguments
+            if not text.strip():
+                raise ValueError("Search query cannot be empty")
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+            search = await cls._capability("search_messages")
+            results = await search(text, user_id, conversation_id, limit, offset, fields)
+            logger.info(f"✅ Found {len(results)} messages matching search")
+            return results
+        except Exception as e:
+            logger.error(f"❌ Error searching messages: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_user_conversations(
+        cls,
+        user_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of a user's conversations, most recently active first.
+
+        Returns the page and the cursor for the next one (None on the last page).
+        """
+        try:
+            # Validate arguments
+            if not user_id:
+                raise ValueError("User ID cannot be empty")
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+            get_conversations = await cls._capability("get_user_conversations")
+            conversations, next_cursor = await get_conversations(user_id, limit, after)
+            logger.info(f"✅ Retrieved {len(conversations)} conversations for user {user_id}")
+            return conversations, next_cursor
+        except Exception as e:
+            logger.error(f"❌ Error getting user conversations: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def rebuild_conversations(cls) -> int:
+        """Recompute the per-conversation summaries behind get_user_conversations"""
+        try:
+            rebuild = await cls._capability("rebuild_conversations")
+            count = await rebuild()
+            logger.info(f"✅ Rebuilt {count} conversations")
+            return count
+        except Exception as e:
+            logger.error(f"❌ Error rebuilding conversations: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def migrate_string_timestamps(
+        cls,
+        batch_size: int = 1000,
+        pause_seconds: float = 0.1,
+        max_batches: Optional[int] = None,
+        restart: bool = False,
+        source_timezone: tzinfo = timezone.utc
+    ) -> Dict[str, int]:
+        """Rewrite legacy ISO-string timestamps as datetimes in resumable batches.
+
+        Strings without an offset are read in ``source_timezone``; see
+        MongoBackend.migrate_string_timestamps.
+        """
+        try:
+            if batch_size < 1:
+                raise ValueError("Batch size must be at least 1")
+
+            migrate = await cls._capability("migrate_string_timestamps")
+            stats = await migrate(batch_size, pause_seconds, max_batches, restart, source_timezone)
+            logger.info(f"✅ Timestamp migration finished: {stats}")
+            return stats
+        except Exception as e:
+            logger.error(f"❌ Error migrating timestamps: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_conversation_stats(cls, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Aggregate message counts and per-participant volume for a conversation"""
+        try:
+            # Validate conversation ID
+            if not conversation_id:
+                raise ValueError("Conversation ID cannot be empty")
+
+            get_stats = await cls._capability("get_conversation_stats")
+            stats = await get_stats(conversation_id)
+            if stats is not None:
+                logger.info(f"✅ Aggregated stats for conversation {conversation_id}")
+            return stats
+        except Exception as e:
+            logger.error(f"❌ Error getting conversation stats: {str(e)}")
+            raise
+
+    @classmethod
+    @timed_operation
+    async def get_user_stats(cls, user_id: str, top_conversations: int = 20) -> Optional[Dict[str, Any]]:
+        """Aggregate a user's message volume, overall and for their busiest conversations"""
+        try:
+            # Validate user ID
+            if not user_id:
+                raise ValueError("User ID cannot be empty")
+
+            get_stats = await cls._capability("get_user_stats")
+            stats = await get_stats(user_id, top_conversations)
+            if stats is not None:
+                logger.info(f"✅ Aggregated stats for user {user_id}")
+            return stats
+        except Exception as e:
+            logger.error(f"❌ Error getting user stats: {str(e)}")
+            raise
+
+    @classmethod
+    async def watch_messages(cls, resume_after: Optional[Dict[str, Any]] = None):
+        """Open a stream of inserted messages from every worker, resuming after a token"""
+        watch = await cls._capability("watch_messages")
+        return watch(resume_after)
+
+    @classmethod
+    @timed_operation
     async def delete_conversation(cls, conversation_id: str) -> bool:
         """Delete all messages in a conversation"""
         try:
@@ -152,10 +655,11 @@ class Database:
             if not conversation_id:
                 raise ValueError("Conversation ID cannot be empty")
 
-            collection = await cls.get_messages_collection()
-            result = await collection.delete_many({"conversation_id": conversation_id})
-            logger.info(f"✅ Deleted {result.deleted_count} messages from conversation {conversation_id}")
-            return result.deleted_count > 0
+            backend = await cls.get_backend()
+            deleted_count = await backend.delete_conversation(conversation_id)
+            cls._notify_change(conversation_id)
+            logger.info(f"✅ Deleted {deleted_count} messages from conversation {conversation_id}")
+            return deleted_count > 0
         except Exception as e:
             logger.error(f"❌ Error deleting conversation: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
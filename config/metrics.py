@@ -0,0 +1,182 @@
+import os
+import time
+import inspect
+import functools
+from typing import Any, Callable, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+# With several worker processes (gunicorn), set PROMETHEUS_MULTIPROC_DIR to an
+# empty directory shared by the workers; each writes its samples there and
+# /metrics aggregates them
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving an HTTP request to sending the last byte of the response",
+    ["method", "route"]
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+DB_OPERATION_SECONDS = Histogram(
+    "db_operation_duration_seconds",
+    "Duration of Database operations",
+    ["operation", "status"]
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongo_pool_connections",
+    "Open connections in the MongoDB connection pool",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongo_pool_checked_out_connections",
+    "MongoDB connections currently checked out of the pool",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total",
+    "Failed MongoDB connection checkouts",
+    ["address", "reason"]
+)
+SUMMARY_STAGE_SECONDS = Histogram(
+    "summarizer_stage_duration_seconds",
+    "Duration of each summarization stage",
+    ["stage"]
+)
+SUMMARY_POOL_PENDING = Gauge(
+    "summary_pool_pending_jobs",
+    "Summarization jobs queued or running in the process pool",
+    multiprocess_mode="livesum"
+)
+
+def timed_operation(func: Callable) -> Callable:
+    """Record the duration of a Database operation, labelled by method name.
+
+    Async generators are timed from the first item until they are exhausted
+    or closed.
+    """
+    operation = func.__name__
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def generator_wrapper(*args: Any, **kwargs: Any):
+            start = time.perf_counter()
+            status = "error"
+            try:
+                async for item in func(*args, **kwargs):
+                    yield item
+                status = "ok"
+            finally:
+                DB_OPERATION_SECONDS.labels(operation, status).observe(time.perf_counter() - start)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await func(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            DB_OPERATION_SECONDS.labels(operation, status).observe(time.perf_counter() - start)
+    return wrapper
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Track MongoDB connection pool size and checkouts"""
+
+    @staticmethod
+    def _address(event: Any) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.labels(self._address(event)).inc()
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.labels(self._address(event)).dec()
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_CHECKED_OUT.labels(self._address(event)).inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.labels(self._address(event)).dec()
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.labels(self._address(event), str(event.reason)).inc()
+
+def _route_template(scope: dict) -> str:
+    """Return the path template of the route matching a request, to keep label cardinality bounded"""
+    from starlette.routing import Match
+
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts, latency and in-flight requests.
+
+    Latency runs until the last body chunk is sent, so streamed responses are
+    measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            in_progress.dec()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format, across workers when configured"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,804 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+from pymongo.errors import BulkWriteError, WriteConcernError, WriteError
+from bson import ObjectId
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone, tzinfo
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from config.database import SEARCH_BACKEND, encode_cursor, decode_cursor, page_cursors, to_naive_utc, utc_now
+from config.metrics import timed_operation, PoolMetricsListener
+from config.storage import Page, overlap_start
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# MongoDB Configuration
+MONGODB_URL = os.getenv("MONGODB_URL")
+
+DATABASE_NAME = os.getenv("MONGODB_DB", "chat_db")
+MESSAGES_COLLECTION = "messages"
+SUMMARY_STATE_COLLECTION = "summary_state"
+CONVERSATIONS_COLLECTION = "conversations"
+MIGRATIONS_COLLECTION = "migrations"
+# Scratch collection rebuild_conversations swaps in for CONVERSATIONS_COLLECTION
+CONVERSATIONS_REBUILD_COLLECTION = "conversations_rebuild"
+
+# Characters of the latest message kept on each conversation document
+CONVERSATION_PREVIEW_LENGTH = 100
+
+# Documents fetched per server round trip when streaming results
+STREAM_BATCH_SIZE = int(os.getenv("MONGODB_STREAM_BATCH_SIZE", "500"))
+
+# Optional write coalescing for store_message
+WRITE_BATCHING = os.getenv("MONGODB_WRITE_BATCHING", "false").lower() in ("1", "true", "yes")
+WRITE_BATCH_SIZE = int(os.getenv("MONGODB_WRITE_BATCH_SIZE", "100"))
+WRITE_BATCH_DELAY_MS = float(os.getenv("MONGODB_WRITE_BATCH_DELAY_MS", "5"))
+
+
+def build_projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+    """Build a find() projection returning only ``fields`` (plus _id), or None for whole documents"""
+    if fields is None:
+        return None
+    return {field: 1 for field in fields}
+
+
+def timestamp_range(since: Optional[datetime], until: Optional[datetime]) -> Optional[Dict[str, Any]]:
+    """Build a filter for since <= timestamp < until, or None if unbounded.
+
+    Timestamps are stored as BSON datetimes, but messages written before
+    that may still hold ISO strings until ``manage.py migrate-timestamps``
+    has run. A range operator only matches values of its own BSON type, so
+    the filter checks both representations.
+    """
+    if since is None and until is None:
+        return None
+    as_datetime: Dict[str, Any] = {}
+    as_string: Dict[str, Any] = {}
+    if since is not None:
+        as_datetime["$gte"] = to_naive_utc(since)
+        as_string["$gte"] = to_naive_utc(since).isoformat()
+    if until is not None:
+        as_datetime["$lt"] = to_naive_utc(until)
+        as_string["$lt"] = to_naive_utc(until).isoformat()
+    return {"$or": [{"timestamp": as_datetime}, {"timestamp": as_string}]}
+
+
+def keyset_filter(field: str, value: Any, last_id: Any, op: str) -> Dict[str, Any]:
+    """Build a filter for documents past (value, last_id) in (field, _id) order.
+
+    ``op`` is "$gt" walking up and "$lt" walking down. A comparison only
+    matches values of its own BSON type, and MongoDB sorts legacy ISO
+    strings before datetimes, so a walk that crosses from one type to the
+    other also takes every value of the other type.
+    """
+    branches: List[Dict[str, Any]] = [
+        {field: {op: value}},
+        {field: value, "_id": {op: last_id}}
+    ]
+    if op == "$gt" and isinstance(value, str):
+        branches.append({field: {"$type": "date"}})
+    elif op == "$lt" and isinstance(value, datetime):
+        branches.append({field: {"$type": "string"}})
+    return {"$or": branches}
+
+
+def bson_timestamp_key(value: Any) -> Tuple[bool, Any]:
+    """Sort key ordering timestamps as MongoDB does, with strings before datetimes"""
+    return isinstance(value, datetime), value
+
+
+def iso(value: Any) -> Any:
+    """Render a datetime as an ISO string, leaving other values untouched"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def conversation_updates(messages: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """Build upserts that fold stored messages into their conversation documents.
+
+    Messages are grouped per conversation so a batch costs one update per
+    conversation. Each update is a pipeline applied atomically to its
+    document: the count is added to, participants appended and the time
+    range widened, and the last-message fields only move forward when the
+    batch's latest message is at least as new as the stored one, so
+    concurrent writers never lose updates or go back in time.
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for msg in messages:
+        grouped.setdefault(msg["conversation_id"], []).append(msg)
+
+    updates = []
+    for conversation_id, msgs in grouped.items():
+        timestamps = [msg["timestamp"] for msg in msgs]
+        # On equal timestamps the later message in the batch wins
+        latest = max(reversed(msgs), key=lambda msg: bson_timestamp_key(msg["timestamp"]))
+        participants = {"$ifNull": ["$participants", []]}
+        # Message data is wrapped in $literal so text starting with "$" is not read as a field path
+        newer = {"$gte": [
+            {"$literal": latest["timestamp"]},
+            {"$ifNull": ["$last_message_at", {"$literal": latest["timestamp"]}]}
+        ]}
+        updates.append(UpdateOne(
+            {"_id": conversation_id},
+            [{"$set": {
+                "message_count": {"$add": [{"$ifNull": ["$message_count", 0]}, len(msgs)]},
+                "participants": {"$concatArrays": [participants, {"$filter": {
+                    "input": {"$literal": list(dict.fromkeys(msg["user_id"] for msg in msgs))},
+                    "cond": {"$not": [{"$in": ["$$this", participants]}]}
+                }}]},
+                "first_message_at": {"$min": ["$first_message_at", {"$literal": min(timestamps, key=bson_timestamp_key)}]},
+                "last_message_at": {"$max": ["$last_message_at", {"$literal": max(timestamps, key=bson_timestamp_key)}]},
+                "last_message_id": {"$cond": [newer, latest["_id"], "$last_message_id"]},
+                "last_message_user_id": {"$cond": [newer, {"$literal": latest["user_id"]}, "$last_message_user_id"]},
+                "last_message_preview": {"$cond": [
+                    newer,
+                    {"$literal": latest["message"][:CONVERSATION_PREVIEW_LENGTH]},
+                    "$last_message_preview"
+                ]}
+            }}],
+            upsert=True
+        ))
+    return updates
+
+
+@timed_operation
+async def update_conversations(conversations, messages: List[Dict[str, Any]]) -> None:
+    """Fold newly stored messages into the conversations collection.
+
+    The messages are already durable at this point, so a failure here is
+    logged rather than raised; ``manage.py rebuild-conversations``
+    recomputes the collection from the messages.
+    """
+    if not messages:
+        return
+    try:
+        await conversations.bulk_write(conversation_updates(messages), ordered=False)
+    except Exception as e:
+        logger.error(f"❌ Error updating conversations: {str(e)}")
+
+
+class WriteBatcher:
+    """Coalesce concurrent single-document inserts into insert_many calls.
+
+    A batch is flushed once it holds ``max_size`` documents or ``max_delay``
+    seconds after its first document arrived, whichever comes first. Each
+    caller awaits a future that resolves to its own inserted id only after
+    the whole batch has been acknowledged by the server.
+    """
+
+    def __init__(
+        self,
+        collection,
+        conversations=None,
+        max_size: int = WRITE_BATCH_SIZE,
+        max_delay: float = WRITE_BATCH_DELAY_MS / 1000
+    ):
+        self.collection = collection
+        self.conversations = conversations
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+
+    async def submit(self, document: Dict[str, Any]) -> ObjectId:
+        """Queue a document and wait until its batch has been written"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((document, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Hand the pending batch to a background write task"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._write(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Write one batch and resolve every caller's future"""
+        errors: Dict[int, Dict[str, Any]] = {}
+        try:
+            await self.collection.insert_many([doc for doc, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+            concern_errors = e.details.get("writeConcernErrors", [])
+            if concern_errors:
+                # The writes were not acknowledged as durable, so no caller may treat its message as stored
+                err = concern_errors[0]
+                error = WriteConcernError(err.get("errmsg", "Write concern failed"), err.get("code"), err)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                return
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if self.conversations is not None:
+            stored = [doc for i, (doc, _) in enumerate(batch) if i not in errors]
+            await update_conversations(self.conversations, stored)
+
+        for i, (doc, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i in errors:
+                err = errors[i]
+                future.set_exception(WriteError(err.get("errmsg", "Write failed"), err.get("code"), err))
+            else:
+                future.set_result(doc["_id"])
+        logger.debug(f"Flushed write batch of {len(batch)} messages ({len(errors)} failed)")
+
+    async def close(self) -> None:
+        """Flush whatever is pending and wait for all in-flight batches"""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+
+class MongoBackend:
+    """Message storage in MongoDB, the default STORAGE_BACKEND.
+
+    Besides the StorageBackend methods it keeps a conversations collection
+    up to date on every write, and provides the capabilities built on
+    MongoDB features: text search, conversation lists, aggregated stats,
+    change streams and the maintenance commands in manage.py.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = MONGODB_URL,
+        database: str = DATABASE_NAME,
+        batch_size: int = STREAM_BATCH_SIZE,
+        write_batching: bool = WRITE_BATCHING
+    ):
+        self.url = url
+        self.database = database
+        self.batch_size = batch_size
+        self.write_batching = write_batching
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db = None
+        self.write_batcher: Optional[WriteBatcher] = None
+
+    @property
+    def messages(self):
+        return self.db[MESSAGES_COLLECTION]
+
+    @property
+    def summary_state(self):
+        return self.db[SUMMARY_STATE_COLLECTION]
+
+    @property
+    def conversations(self):
+        return self.db[CONVERSATIONS_COLLECTION]
+
+    async def connect(self) -> None:
+        try:
+            if not self.url:
+                raise ValueError("MONGODB_URL environment variable is not set")
+            logger.info("Connecting to MongoDB Atlas")
+
+            # Configure MongoDB client with basic settings
+            self.client = AsyncIOMotorClient(
+                self.url,
+                serverSelectionTimeoutMS=5000,
+                connectTimeoutMS=5000,
+                maxPoolSize=50,
+                minPoolSize=0,
+                tls=True,
+                tlsAllowInvalidCertificates=True,
+                event_listeners=[PoolMetricsListener()]
+            )
+
+            logger.info("Client created, attempting to access database...")
+            self.db = self.client[self.database]
+
+            # Verify connection with a simple command
+            logger.info("Verifying connection with ping command...")
+            await self.client.admin.command('ping')
+            logger.info("✅ Successfully connected to MongoDB Atlas!")
+
+            # Create indexes
+            logger.info("Creating database indexes...")
+            collection = self.messages
+            await collection.create_index("user_id")
+            await collection.create_index("conversation_id")
+            # Backs time-range reads of a user's history
+            await collection.create_index([
+                ("user_id", ASCENDING),
+                ("timestamp", ASCENDING),
+                ("_id", ASCENDING)
+            ])
+            # Backs keyset pagination over a conversation's history
+            await collection.create_index([
+                ("conversation_id", ASCENDING),
+                ("timestamp", ASCENDING),
+                ("_id", ASCENDING)
+            ])
+            # Backs incremental reads past a summary high-water mark
+            await collection.create_index([("conversation_id", ASCENDING), ("_id", ASCENDING)])
+            # Backs full-text message search
+            if SEARCH_BACKEND == "text":
+                await collection.create_index([("message", TEXT)], default_language="english")
+            await self._create_conversation_indexes(self.conversations)
+            logger.info("✅ Database indexes created")
+
+            if self.write_batching:
+                self.write_batcher = WriteBatcher(collection, self.conversations)
+                logger.info(
+                    f"Write batching enabled (size={WRITE_BATCH_SIZE}, delay={WRITE_BATCH_DELAY_MS}ms)"
+                )
+
+        except Exception as e:
+            logger.error(f"❌ MongoDB Connection Error: {str(e)}")
+            if self.client:
+                self.client.close()
+                self.client = None
+                self.db = None
+            raise
+
+    @staticmethod
+    async def _create_conversation_indexes(conversations) -> None:
+        """Create the indexes the conversations collection is read through"""
+        # Backs a user's conversation list ordered by recency
+        await conversations.create_index([
+            ("participants", ASCENDING),
+            ("last_message_at", DESCENDING),
+            ("_id", DESCENDING)
+        ])
+
+    async def close(self) -> None:
+        if self.write_batcher:
+            await self.write_batcher.close()
+            self.write_batcher = None
+        if self.client:
+            self.client.close()
+            self.client = None
+            self.db = None
+            logger.info("Closed MongoDB connection")
+
+    async def insert_messages(self, messages: List[Dict[str, Any]]) -> Dict[int, str]:
+        if self.write_batcher is not None and len(messages) == 1:
+            # Single writes are coalesced with other requests' writes
+            try:
+                await self.write_batcher.submit(messages[0])
+            except (WriteError, WriteConcernError) as e:
+                return {0: str(e)}
+            return {}
+
+        errors: Dict[int, str] = {}
+        try:
+            await self.messages.insert_many(messages, ordered=False)
+        except BulkWriteError as e:
+            errors = {err["index"]: err.get("errmsg", "Write failed") for err in e.details.get("writeErrors", [])}
+            concern_errors = e.details.get("writeConcernErrors", [])
+            if concern_errors:
+                # The writes were not acknowledged as durable, so none can be reported as stored
+                message = concern_errors[0].get("errmsg", "Write concern failed")
+                errors = {i: errors.get(i, message) for i in range(len(messages))}
+        await update_conversations(
+            self.conversations,
+            [doc for i, doc in enumerate(messages) if i not in errors]
+        )
+        return errors
+
+    async def get_conversation(self, conversation_id: str, fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        cursor = self.messages.find({"conversation_id": conversation_id}, build_projection(fields))
+        return await cursor.to_list(length=None)
+
+    async def get_conversation_page(
+        self,
+        conversation_id: str,
+        limit: int,
+        after: Optional[str],
+        before: Optional[str],
+        direction: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> Page:
+        # Walking backwards scans the index the other way and flips the page afterwards
+        ascending = (direction == "asc") != bool(before)
+        order = ASCENDING if ascending else DESCENDING
+        op = "$gt" if ascending else "$lt"
+
+        conditions: List[Dict[str, Any]] = [{"conversation_id": conversation_id}]
+        time_filter = timestamp_range(since, until)
+        if time_filter:
+            conditions.append(time_filter)
+        cursor_value = after or before
+        if cursor_value:
+            timestamp, last_id = decode_cursor(cursor_value)
+            conditions.append(keyset_filter("timestamp", timestamp, last_id, op))
+        query = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+        cursor = self.messages.find(query, build_projection(fields)).sort(
+            [("timestamp", order), ("_id", order)]
+        ).limit(limit + 1)
+        return page_cursors(await cursor.to_list(length=limit + 1), limit, after, before)
+
+    async def get_messages_after(
+        self,
+        conversation_id: str,
+        after_id: Optional[ObjectId],
+        overlap_seconds: float,
+        fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"conversation_id": conversation_id}
+        if after_id is not None:
+            if overlap_seconds:
+                query["_id"] = {"$gte": overlap_start(after_id, overlap_seconds)}
+            else:
+                query["_id"] = {"$gt": after_id}
+        cursor = self.messages.find(query, build_projection(fields)).sort("_id", ASCENDING)
+        return await cursor.to_list(length=None)
+
+    async def get_conversation_version(self, conversation_id: str) -> Optional[str]:
+        latest = await self.messages.find_one(
+            {"conversation_id": conversation_id},
+            projection={"_id": 1},
+            sort=[("_id", DESCENDING)]
+        )
+        return str(latest["_id"]) if latest else None
+
+    async def get_summary_state(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return await self.summary_state.find_one({"_id": conversation_id})
+
+    async def save_summary_state(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        await self.summary_state.replace_one({"_id": conversation_id}, state, upsert=True)
+
+    @staticmethod
+    def user_messages_query(
+        user_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Build the filter for a user's messages, optionally within [since, until)"""
+        time_filter = timestamp_range(since, until)
+        if time_filter:
+            return {"$and": [{"user_id": user_id}, time_filter]}
+        return {"user_id": user_id}
+
+    async def _iterate(self, cursor) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a cursor's documents, closing it even when the caller stops early"""
+        try:
+            async for msg in cursor.batch_size(self.batch_size):
+                yield msg
+        finally:
+            await cursor.close()
+
+    async def iter_user_messages(
+        self,
+        user_id: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        order: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        sort_order = ASCENDING if order == "asc" else DESCENDING
+        cursor = self.messages.find(
+            self.user_messages_query(user_id, since, until),
+            build_projection(fields)
+        ).sort([("timestamp", sort_order), ("_id", sort_order)])
+        async for msg in self._iterate(cursor):
+            yield msg
+
+    async def iter_messages(self, fields: Optional[List[str]], since_id: Optional[ObjectId]) -> AsyncIterator[Dict[str, Any]]:
+        query = {} if since_id is None else {"_id": {"$gte": since_id}}
+        cursor = self.messages.find(query, build_projection(fields)).sort("_id", ASCENDING)
+        async for msg in self._iterate(cursor):
+            yield msg
+
+    async def iter_conversations(
+        self,
+        conversation_ids: List[str],
+        fields: Optional[List[str]]
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        # One $in query ordered by conversation and _id (served by the
+        # conversation_id/_id index), so each conversation is complete when
+        # the next one starts
+        cursor = self.messages.find(
+            {"conversation_id": {"$in": conversation_ids}},
+            build_projection(fields)
+        ).sort([("conversation_id", ASCENDING), ("_id", ASCENDING)])
+        current_id = None
+        messages: List[Dict[str, Any]] = []
+        async for msg in self._iterate(cursor):
+            if msg["conversation_id"] != current_id:
+                if messages:
+                    yield current_id, messages
+                current_id = msg["conversation_id"]
+                messages = []
+            messages.append(msg)
+        if messages:
+            yield current_id, messages
+
+    async def get_messages_by_ids(self, message_ids: List[ObjectId], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        cursor = self.messages.find({"_id": {"$in": message_ids}}, build_projection(fields))
+        by_id = {msg["_id"]: msg async for msg in cursor}
+        return [by_id[message_id] for message_id in message_ids if message_id in by_id]
+
+    async def delete_conversation(self, conversation_id: str) -> int:
+        result = await self.messages.delete_many({"conversation_id": conversation_id})
+        await self.summary_state.delete_one({"_id": conversation_id})
+        await self.conversations.delete_one({"_id": conversation_id})
+        return result.deleted_count
+
+    async def search_messages(
+        self,
+        text: str,
+        user_id: Optional[str],
+        conversation_id: Optional[str],
+        limit: int,
+        offset: int,
+        fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        """Full-text search through the message text index, with each result's ``score``"""
+        query: Dict[str, Any] = {"$text": {"$search": text}}
+        if user_id:
+            query["user_id"] = user_id
+        if conversation_id:
+            query["conversation_id"] = conversation_id
+        projection: Dict[str, Any] = build_projection(fields) or {}
+        projection["score"] = {"$meta": "textScore"}
+
+        cursor = self.messages.find(query, projection).sort(
+            [("score", {"$meta": "textScore"})]
+        ).skip(offset).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def get_user_conversations(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of a user's conversations from the conversations collection"""
+        query: Dict[str, Any] = {"participants": user_id}
+        if after:
+            last_message_at, last_id = decode_cursor(after)
+            query.update(keyset_filter("last_message_at", last_message_at, last_id, "$lt"))
+
+        cursor = self.conversations.find(query).sort(
+            [("last_message_at", DESCENDING), ("_id", DESCENDING)]
+        ).limit(limit + 1)
+        conversations = await cursor.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            next_cursor = encode_cursor(conversations[-1], field="last_message_at")
+
+        for conv in conversations:
+            conv["conversation_id"] = conv.pop("_id")
+            conv["last_message_id"] = str(conv["last_message_id"])
+            conv["first_message_at"] = iso(conv.get("first_message_at"))
+            conv["last_message_at"] = iso(conv.get("last_message_at"))
+        return conversations, next_cursor
+
+    async def rebuild_conversations(self) -> int:
+        """Recompute the conversations collection from the messages, server-side.
+
+        The result is written to a scratch collection that then replaces the
+        live one in a single rename, so conversations whose messages are all
+        gone disappear and readers never see a half-built collection.
+        """
+        pipeline = [
+            # The last message is the newest by timestamp, as in conversation_updates
+            {"$sort": {"timestamp": ASCENDING, "_id": ASCENDING}},
+            {"$group": {
+                "_id": "$conversation_id",
+                "message_count": {"$sum": 1},
+                "participants": {"$addToSet": "$user_id"},
+                "first_message_at": {"$min": "$timestamp"},
+                "last_message_at": {"$max": "$timestamp"},
+                "last_message_id": {"$last": "$_id"},
+                "last_message_user_id": {"$last": "$user_id"},
+                "last_message": {"$last": "$message"}
+            }},
+            {"$project": {
+                "message_count": 1,
+                "participants": 1,
+                "first_message_at": 1,
+                "last_message_at": 1,
+                "last_message_id": 1,
+                "last_message_user_id": 1,
+                "last_message_preview": {"$substrCP": ["$last_message", 0, CONVERSATION_PREVIEW_LENGTH]}
+            }},
+            {"$out": CONVERSATIONS_REBUILD_COLLECTION}
+        ]
+        await self.messages.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        rebuilt = self.db[CONVERSATIONS_REBUILD_COLLECTION]
+        await self._create_conversation_indexes(rebuilt)
+        await rebuilt.rename(CONVERSATIONS_COLLECTION, dropTarget=True)
+        return await self.conversations.count_documents({})
+
+    async def migrate_string_timestamps(
+        self,
+        batch_size: int,
+        pause_seconds: float,
+        max_batches: Optional[int],
+        restart: bool,
+        source_timezone: tzinfo = timezone.utc
+    ) -> Dict[str, int]:
+        """Rewrite legacy ISO-string timestamps as BSON datetimes, in _id order.
+
+        Legacy strings were written with ``datetime.now()``, i.e. in the
+        writing host's local time and without an offset; such strings are
+        read in ``source_timezone`` and stored as UTC. Strings carrying an
+        offset are converted using it.
+
+        Progress is checkpointed in the migrations collection after every
+        batch, so an interrupted run resumes where it stopped. Each update
+        only applies if the document still holds the original string, and
+        ``pause_seconds`` between batches limits the load on a live cluster.
+        """
+        collection = self.messages
+        migrations = self.db[MIGRATIONS_COLLECTION]
+        if restart:
+            await migrations.delete_one({"_id": "string_timestamps"})
+        checkpoint = await migrations.find_one({"_id": "string_timestamps"}) or {}
+        last_id = checkpoint.get("last_id")
+        stats = {
+            "converted": checkpoint.get("converted", 0),
+            "failed": checkpoint.get("failed", 0),
+            "batches": 0
+        }
+        if last_id is not None:
+            logger.info(f"Resuming timestamp migration after {last_id}")
+
+        while max_batches is None or stats["batches"] < max_batches:
+            query: Dict[str, Any] = {"timestamp": {"$type": "string"}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            cursor = collection.find(query, {"timestamp": 1}).sort("_id", ASCENDING).limit(batch_size)
+            batch = await cursor.to_list(length=batch_size)
+            if not batch:
+                break
+
+            updates = []
+            for doc in batch:
+                try:
+                    parsed = datetime.fromisoformat(doc["timestamp"])
+                    if parsed.tzinfo is None:
+                        parsed = parsed.replace(tzinfo=source_timezone)
+                    parsed = to_naive_utc(parsed)
+                except ValueError:
+                    stats["failed"] += 1
+                    logger.warning(f"Skipping message {doc['_id']} with unparseable timestamp {doc['timestamp']!r}")
+                    continue
+                updates.append(UpdateOne(
+                    {"_id": doc["_id"], "timestamp": doc["timestamp"]},
+                    {"$set": {"timestamp": parsed}}
+                ))
+            if updates:
+                result = await collection.bulk_write(updates, ordered=False)
+                stats["converted"] += result.modified_count
+
+            last_id = batch[-1]["_id"]
+            stats["batches"] += 1
+            await migrations.update_one(
+                {"_id": "string_timestamps"},
+                {"$set": {
+                    "last_id": last_id,
+                    "converted": stats["converted"],
+                    "failed": stats["failed"],
+                    "updated_at": utc_now()
+                }},
+                upsert=True
+            )
+            logger.info(f"Migrated batch {stats['batches']}: {stats['converted']} converted, {stats['failed']} failed so far")
+            if pause_seconds:
+                await asyncio.sleep(pause_seconds)
+        return stats
+
+    async def get_conversation_stats(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Aggregate message counts and per-participant volume for a conversation"""
+        pipeline = [
+            {"$match": {"conversation_id": conversation_id}},
+            {"$group": {
+                "_id": "$user_id",
+                "message_count": {"$sum": 1},
+                "first_message_at": {"$min": "$timestamp"},
+                "last_message_at": {"$max": "$timestamp"}
+            }},
+            {"$sort": {"message_count": DESCENDING, "_id": ASCENDING}},
+            {"$group": {
+                "_id": None,
+                "message_count": {"$sum": "$message_count"},
+                "first_message_at": {"$min": "$first_message_at"},
+                "last_message_at": {"$max": "$last_message_at"},
+                "participants": {"$push": {
+                    "user_id": "$_id",
+                    "message_count": "$message_count",
+                    "first_message_at": "$first_message_at",
+                    "last_message_at": "$last_message_at"
+                }}
+            }}
+        ]
+        results = await self.messages.aggregate(pipeline).to_list(length=1)
+        if not results or not results[0]["message_count"]:
+            return None
+
+        stats = results[0]
+        participants = [
+            {**p, "first_message_at": iso(p["first_message_at"]), "last_message_at": iso(p["last_message_at"])}
+            for p in stats["participants"]
+        ]
+        return {
+            "conversation_id": conversation_id,
+            "message_count": stats["message_count"],
+            "participant_count": len(participants),
+            "first_message_at": iso(stats["first_message_at"]),
+            "last_message_at": iso(stats["last_message_at"]),
+            "participants": participants
+        }
+
+    async def get_user_stats(self, user_id: str, top_conversations: int) -> Optional[Dict[str, Any]]:
+        """Aggregate a user's message volume, overall and for their busiest conversations"""
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$group": {
+                "_id": "$conversation_id",
+                "message_count": {"$sum": 1},
+                "first_message_at": {"$min": "$timestamp"},
+                "last_message_at": {"$max": "$timestamp"}
+            }},
+            {"$sort": {"message_count": DESCENDING, "_id": ASCENDING}},
+            {"$group": {
+                "_id": None,
+                "message_count": {"$sum": "$message_count"},
+                "conversation_count": {"$sum": 1},
+                "first_message_at": {"$min": "$first_message_at"},
+                "last_message_at": {"$max": "$last_message_at"},
+                "conversations": {"$push": {
+                    "conversation_id": "$_id",
+                    "message_count": "$message_count",
+                    "first_message_at": "$first_message_at",
+                    "last_message_at": "$last_message_at"
+                }}
+            }},
+            {"$project": {
+                "message_count": 1,
+                "conversation_count": 1,
+                "first_message_at": 1,
+                "last_message_at": 1,
+                "conversations": {"$slice": ["$conversations", top_conversations]}
+            }}
+        ]
+        results = await self.messages.aggregate(pipeline).to_list(length=1)
+        if not results or not results[0]["message_count"]:
+            return None
+
+        stats = results[0]
+        conversations = [
+            {**c, "first_message_at": iso(c["first_message_at"]), "last_message_at": iso(c["last_message_at"])}
+            for c in stats["conversations"]
+        ]
+        return {
+            "user_id": user_id,
+            "message_count": stats["message_count"],
+            "conversation_count": stats["conversation_count"],
+            "first_message_at": iso(stats["first_message_at"]),
+            "last_message_at": iso(stats["last_message_at"]),
+            "conversations": conversations
+        }
+
+    def watch_messages(self, resume_after: Optional[Dict[str, Any]] = None):
+        """Open a change stream of message inserts (requires a replica set)"""
+        return self.messages.watch(
+            [{"$match": {"operationType": "insert"}}],
+            resume_after=resume_after
+        )
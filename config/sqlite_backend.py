@@ -0,0 +1,273 @@
+import os
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+import aiosqlite
+import bson
+from bson import ObjectId
+from config.database import page_cursors, to_naive_utc
+from config.storage import Page, project, cursor_key, overlap_start
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "chat.db")
+
+# Ids per query in IN (...) lookups, below SQLite's historical limit of 999 bound parameters
+SQLITE_IN_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    message TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation_time ON messages (conversation_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS messages_user_time ON messages (user_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS messages_conversation_id ON messages (conversation_id, id);
+CREATE TABLE IF NOT EXISTS summary_state (
+    conversation_id TEXT PRIMARY KEY,
+    state BLOB NOT NULL
+);
+"""
+
+COLUMNS = "id, conversation_id, user_id, message, timestamp"
+
+def _encode_timestamp(value: datetime) -> str:
+    """Fixed-width ISO text, so string order matches time order"""
+    return to_naive_utc(value).isoformat(timespec="microseconds")
+
+def _row_to_message(row: Tuple) -> Dict[str, Any]:
+    message_id, conversation_id, user_id, message, timestamp = row
+    return {
+        "_id": ObjectId(message_id),
+        "conversation_id": conversation_id,
+        "user_id": user_id,
+        "message": message,
+        "timestamp": datetime.fromisoformat(timestamp),
+    }
+
+class SQLiteBackend:
+    """Message storage in a local SQLite file, for deployments without MongoDB.
+
+    Ids are stored as ObjectId hex strings and timestamps as fixed-width ISO
+    text, so both sort correctly as text and the (timestamp, id) indexes
+    serve the same keyset pages as MongoDB. WAL mode lets the workers on one
+    host share the file.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self.db: Optional[aiosqlite.Connection] = None
+
+    async def connect(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = await aiosqlite.connect(self.path)
+        await self.db.execute("PRAGMA journal_mode=WAL")
+        await self.db.execute("PRAGMA synchronous=NORMAL")
+        await self.db.executescript(SCHEMA)
+        await self.db.commit()
+        logger.info(f"Using SQLite storage at {self.path}")
+
+    async def close(self) -> None:
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+    async def _fetch(self, query: str, params: Tuple, fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        async with self.db.execute(query, params) as cursor:
+            return [project(_row_to_message(row), fields) for row in await cursor.fetchall()]
+
+    async def _iterate(self, query: str, params: Tuple, fields: Optional[List[str]]) -> AsyncIterator[Dict[str, Any]]:
+        async with self.db.execute(query, params) as cursor:
+            async for row in cursor:
+                yield project(_row_to_message(row), fields)
+
+    async def insert_messages(self, messages: List[Dict[str, Any]]) -> Dict[int, str]:
+        errors: Dict[int, str] = {}
+        for i, message in enumerate(messages):
+            try:
+                await self.db.execute(
+                    f"INSERT INTO messages ({COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        str(message["_id"]),
+                        message["conversation_id"],
+                        message["user_id"],
+                        message["message"],
+                        _encode_timestamp(message["timestamp"])
+                    )
+                )
+            except sqlite3.IntegrityError as e:
+                errors[i] = str(e)
+        await self.db.commit()
+        return errors
+
+    async def get_conversation(self, conversation_id: str, fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        return await self._fetch(
+            f"SELECT {COLUMNS} FROM messages WHERE conversation_id = ? ORDER BY timestamp, id",
+            (conversation_id,),
+            fields
+        )
+
+    async def get_conversation_page(
+        self,
+        conversation_id: str,
+        limit: int,
+        after: Optional[str],
+        before: Optional[str],
+        direction: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> Page:
+        # Walking backwards scans the index the other way and flips the page afterwards
+        ascending = (direction == "asc") != bool(before)
+        order = "ASC" if ascending else "DESC"
+        op = ">" if ascending else "<"
+
+        conditions = ["conversation_id = ?"]
+        params: List[Any] = [conversation_id]
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_encode_timestamp(since))
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(_encode_timestamp(until))
+        cursor_value = after or before
+        if cursor_value:
+            timestamp, last_id = cursor_key(cursor_value)
+            conditions.append(f"(timestamp {op} ? OR (timestamp = ? AND id {op} ?))")
+            params.extend([_encode_timestamp(timestamp), _encode_timestamp(timestamp), str(last_id)])
+        params.append(limit + 1)
+
+        messages = await self._fetch(
+            f"SELECT {COLUMNS} FROM messages WHERE {' AND '.join(conditions)} "
+            f"ORDER BY timestamp {order}, id {order} LIMIT ?",
+            tuple(params),
+            fields
+        )
+        return page_cursors(messages, limit, after, before)
+
+    async def get_messages_after(
+        self,
+        conversation_id: str,
+        after_id: Optional[ObjectId],
+        overlap_seconds: float,
+        fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        if after_id is None:
+            return await self._fetch(
+                f"SELECT {COLUMNS} FROM messages WHERE conversation_id = ? ORDER BY id",
+                (conversation_id,),
+                fields
+            )
+        if overlap_seconds:
+            condition, bound = "id >= ?", overlap_start(after_id, overlap_seconds)
+        else:
+            condition, bound = "id > ?", after_id
+        return await self._fetch(
+            f"SELECT {COLUMNS} FROM messages WHERE conversation_id = ? AND {condition} ORDER BY id",
+            (conversation_id, str(bound)),
+            fields
+        )
+
+    async def get_conversation_version(self, conversation_id: str) -> Optional[str]:
+        async with self.db.execute("SELECT MAX(id) FROM messages WHERE conversation_id = ?", (conversation_id,)) as cursor:
+            (latest,) = await cursor.fetchone()
+        return latest
+
+    async def get_summary_state(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        async with self.db.execute(
+            "SELECT state FROM summary_state WHERE conversation_id = ?", (conversation_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return bson.decode(row[0]) if row else None
+
+    async def save_summary_state(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        # BSON keeps ObjectIds and datetimes in the state intact
+        await self.db.execute(
+            "INSERT OR REPLACE INTO summary_state (conversation_id, state) VALUES (?, ?)",
+            (conversation_id, bson.encode(dict(state, _id=conversation_id)))
+        )
+        await self.db.commit()
+
+    async def iter_user_messages(
+        self,
+        user_id: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        order: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        conditions = ["user_id = ?"]
+        params: List[Any] = [user_id]
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_encode_timestamp(since))
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(_encode_timestamp(until))
+        direction = "ASC" if order == "asc" else "DESC"
+        async for message in self._iterate(
+            f"SELECT {COLUMNS} FROM messages WHERE {' AND '.join(conditions)} "
+            f"ORDER BY timestamp {direction}, id {direction}",
+            tuple(params),
+            fields
+        ):
+            yield message
+
+    async def iter_messages(self, fields: Optional[List[str]], since_id: Optional[ObjectId]) -> AsyncIterator[Dict[str, Any]]:
+        if since_id is None:
+            query, params = f"SELECT {COLUMNS} FROM messages ORDER BY id", ()
+        else:
+            query, params = f"SELECT {COLUMNS} FROM messages WHERE id >= ? ORDER BY id", (str(since_id),)
+        async for message in self._iterate(query, params, fields):
+            yield message
+
+    async def iter_conversations(
+        self,
+        conversation_ids: List[str],
+        fields: Optional[List[str]]
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        # Chunks of sorted ids keep results in (conversation_id, id) order across queries
+        conversation_ids = sorted(set(conversation_ids))
+        for start in range(0, len(conversation_ids), SQLITE_IN_CHUNK_SIZE):
+            chunk = conversation_ids[start:start + SQLITE_IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            current_id = None
+            messages: List[Dict[str, Any]] = []
+            async for message in self._iterate(
+                f"SELECT {COLUMNS} FROM messages WHERE conversation_id IN ({placeholders}) ORDER BY conversation_id, id",
+                tuple(chunk),
+                None
+            ):
+                if message["conversation_id"] != current_id:
+                    if messages:
+                        yield current_id, messages
+                    current_id = message["conversation_id"]
+                    messages = []
+                messages.append(project(message, fields))
+            if messages:
+                yield current_id, messages
+
+    async def get_messages_by_ids(self, message_ids: List[ObjectId], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        by_id: Dict[ObjectId, Dict[str, Any]] = {}
+        for start in range(0, len(message_ids), SQLITE_IN_CHUNK_SIZE):
+            chunk = [str(message_id) for message_id in message_ids[start:start + SQLITE_IN_CHUNK_SIZE]]
+            placeholders = ", ".join("?" for _ in chunk)
+            for message in await self._fetch(
+                f"SELECT {COLUMNS} FROM messages WHERE id IN ({placeholders})", tuple(chunk), fields
+            ):
+                by_id[message["_id"]] = message
+        return [by_id[message_id] for message_id in message_ids if message_id in by_id]
+
+    async def delete_conversation(self, conversation_id: str) -> int:
+        cursor = await self.db.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+        await self.db.execute("DELETE FROM summary_state WHERE conversation_id = ?", (conversation_id,))
+        await self.db.commit()
+        return cursor.rowcount
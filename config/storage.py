@@ -0,0 +1,272 @@
+import copy
+import bisect
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator, Protocol
+from bson import ObjectId
+from config.database import decode_cursor, page_cursors, to_naive_utc
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+Page = Tuple[List[Dict[str, Any]], Optional[str], Optional[str]]
+
+class StorageBackend(Protocol):
+    """Message storage behind Database, selected by STORAGE_BACKEND.
+
+    Arguments are validated by Database before a backend is called, and
+    messages passed to insert_messages already carry an ObjectId ``_id``.
+    Returned documents have the same shape as MongoDB's: ``_id`` is an
+    ObjectId, ``timestamp`` a naive UTC datetime, and ``fields`` limits the
+    returned fields (plus ``_id``) as a projection would. Callers may modify
+    returned documents.
+
+    Backends may also implement the optional capabilities search_messages,
+    get_user_conversations, rebuild_conversations, migrate_string_timestamps,
+    get_conversation_stats, get_user_stats and watch_messages (see
+    MongoBackend). Database raises UnsupportedByBackend when one is missing.
+    """
+
+    async def connect(self) -> None: ...
+
+    async def close(self) -> None: ...
+
+    async def insert_messages(self, messages: List[Dict[str, Any]]) -> Dict[int, str]:
+        """Store messages, returning an error message for each index that failed"""
+        ...
+
+    async def get_conversation(self, conversation_id: str, fields: Optional[List[str]]) -> List[Dict[str, Any]]: ...
+
+    async def get_conversation_page(
+        self,
+        conversation_id: str,
+        limit: int,
+        after: Optional[str],
+        before: Optional[str],
+        direction: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> Page: ...
+
+    async def get_messages_after(
+        self,
+        conversation_id: str,
+        after_id: Optional[ObjectId],
+        overlap_seconds: float,
+        fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]: ...
+
+    async def get_conversation_version(self, conversation_id: str) -> Optional[str]: ...
+
+    async def get_summary_state(self, conversation_id: str) -> Optional[Dict[str, Any]]: ...
+
+    async def save_summary_state(self, conversation_id: str, state: Dict[str, Any]) -> None: ...
+
+    def iter_user_messages(
+        self,
+        user_id: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        order: str
+    ) -> AsyncIterator[Dict[str, Any]]: ...
+
+    def iter_messages(self, fields: Optional[List[str]], since_id: Optional[ObjectId]) -> AsyncIterator[Dict[str, Any]]: ...
+
+    def iter_conversations(
+        self,
+        conversation_ids: List[str],
+        fields: Optional[List[str]]
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]: ...
+
+    async def get_messages_by_ids(self, message_ids: List[ObjectId], fields: Optional[List[str]]) -> List[Dict[str, Any]]: ...
+
+    async def delete_conversation(self, conversation_id: str) -> int:
+        """Delete a conversation's messages and summary state, returning the number of messages deleted"""
+        ...
+
+def create_backend(name: str) -> StorageBackend:
+    """Build the storage backend called ``name``"""
+    if name == "mongo":
+        from config.mongo_backend import MongoBackend
+        return MongoBackend()
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        from config.sqlite_backend import SQLiteBackend
+        return SQLiteBackend()
+    raise ValueError(f"Unknown storage backend: {name}")
+
+def project(message: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Copy a stored message, keeping only ``fields`` (plus _id) if given"""
+    if fields is None:
+        return dict(message)
+    projected = {"_id": message["_id"]}
+    for field in fields:
+        if field in message:
+            projected[field] = message[field]
+    return projected
+
+def cursor_key(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a pagination cursor into a (timestamp, _id) sort key"""
+    timestamp, message_id = decode_cursor(cursor)
+    if not isinstance(timestamp, datetime) or not isinstance(message_id, ObjectId):
+        raise ValueError("Invalid pagination cursor")
+    return timestamp, message_id
+
+def overlap_start(after_id: ObjectId, overlap_seconds: float) -> ObjectId:
+    """The smallest ObjectId inside the overlap window before ``after_id``"""
+    return ObjectId.from_datetime(after_id.generation_time - timedelta(seconds=overlap_seconds))
+
+def _sort_key(message: Dict[str, Any]) -> Tuple[datetime, ObjectId]:
+    return message["timestamp"], message["_id"]
+
+def _timestamp(message: Dict[str, Any]) -> datetime:
+    return message["timestamp"]
+
+class MemoryBackend:
+    """Process-local storage for benchmarks, tests and single-worker deployments.
+
+    Each conversation's and user's messages are kept sorted by
+    (timestamp, _id), so pages and time ranges are found by bisection.
+    Nothing survives a restart and workers do not share data.
+    """
+
+    def __init__(self):
+        self.messages: Dict[ObjectId, Dict[str, Any]] = {}
+        self.by_conversation: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_user: Dict[str, List[Dict[str, Any]]] = {}
+        self.latest: Dict[str, ObjectId] = {}
+        self.summary_state: Dict[str, Dict[str, Any]] = {}
+
+    async def connect(self) -> None:
+        logger.info("Using in-memory storage")
+
+    async def close(self) -> None:
+        pass
+
+    async def insert_messages(self, messages: List[Dict[str, Any]]) -> Dict[int, str]:
+        errors: Dict[int, str] = {}
+        for i, message in enumerate(messages):
+            if message["_id"] in self.messages:
+                errors[i] = f"Duplicate _id {message['_id']}"
+                continue
+            stored = dict(message)
+            conversation_id = stored["conversation_id"]
+            self.messages[stored["_id"]] = stored
+            bisect.insort(self.by_conversation.setdefault(conversation_id, []), stored, key=_sort_key)
+            bisect.insort(self.by_user.setdefault(stored["user_id"], []), stored, key=_sort_key)
+            if conversation_id not in self.latest or stored["_id"] > self.latest[conversation_id]:
+                self.latest[conversation_id] = stored["_id"]
+        return errors
+
+    async def get_conversation(self, conversation_id: str, fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        return [project(msg, fields) for msg in self.by_conversation.get(conversation_id, [])]
+
+    async def get_conversation_page(
+        self,
+        conversation_id: str,
+        limit: int,
+        after: Optional[str],
+        before: Optional[str],
+        direction: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> Page:
+        messages = self.by_conversation.get(conversation_id, [])
+        lo = bisect.bisect_left(messages, to_naive_utc(since), key=_timestamp) if since else 0
+        hi = bisect.bisect_left(messages, to_naive_utc(until), key=_timestamp) if until else len(messages)
+
+        # Walking backwards reads the range from the other end and flips the page afterwards
+        ascending = (direction == "asc") != bool(before)
+        cursor_value = after or before
+        if cursor_value:
+            key = cursor_key(cursor_value)
+            if ascending:
+                lo = max(lo, bisect.bisect_right(messages, key, key=_sort_key))
+            else:
+                hi = min(hi, bisect.bisect_left(messages, key, key=_sort_key))
+
+        if ascending:
+            window = messages[lo:min(hi, lo + limit + 1)]
+        else:
+            window = messages[max(lo, hi - limit - 1):hi][::-1]
+        return page_cursors([project(msg, fields) for msg in window], limit, after, before)
+
+    async def get_messages_after(
+        self,
+        conversation_id: str,
+        after_id: Optional[ObjectId],
+        overlap_seconds: float,
+        fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        messages = self.by_conversation.get(conversation_id, [])
+        if after_id is not None:
+            if overlap_seconds:
+                start = overlap_start(after_id, overlap_seconds)
+                messages = [msg for msg in messages if msg["_id"] >= start]
+            else:
+                messages = [msg for msg in messages if msg["_id"] > after_id]
+        return [project(msg, fields) for msg in sorted(messages, key=lambda msg: msg["_id"])]
+
+    async def get_conversation_version(self, conversation_id: str) -> Optional[str]:
+        latest = self.latest.get(conversation_id)
+        return str(latest) if latest else None
+
+    async def get_summary_state(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        state = self.summary_state.get(conversation_id)
+        return copy.deepcopy(state) if state is not None else None
+
+    async def save_summary_state(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        self.summary_state[conversation_id] = dict(copy.deepcopy(state), _id=conversation_id)
+
+    async def iter_user_messages(
+        self,
+        user_id: str,
+        fields: Optional[List[str]],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        order: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        messages = self.by_user.get(user_id, [])
+        lo = bisect.bisect_left(messages, to_naive_utc(since), key=_timestamp) if since else 0
+        hi = bisect.bisect_left(messages, to_naive_utc(until), key=_timestamp) if until else len(messages)
+        indexes = range(lo, hi) if order == "asc" else range(hi - 1, lo - 1, -1)
+        for i in indexes:
+            yield project(messages[i], fields)
+
+    async def iter_messages(self, fields: Optional[List[str]], since_id: Optional[ObjectId]) -> AsyncIterator[Dict[str, Any]]:
+        message_ids = self.messages if since_id is None else [i for i in self.messages if i >= since_id]
+        for message_id in sorted(message_ids):
+            message = self.messages.get(message_id)
+            if message is not None:
+                yield project(message, fields)
+
+    async def iter_conversations(
+        self,
+        conversation_ids: List[str],
+        fields: Optional[List[str]]
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        for conversation_id in sorted(set(conversation_ids)):
+            messages = self.by_conversation.get(conversation_id)
+            if messages:
+                yield conversation_id, [
+                    project(msg, fields) for msg in sorted(messages, key=lambda msg: msg["_id"])
+                ]
+
+    async def get_messages_by_ids(self, message_ids: List[ObjectId], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        return [project(self.messages[i], fields) for i in message_ids if i in self.messages]
+
+    async def delete_conversation(self, conversation_id: str) -> int:
+        messages = self.by_conversation.pop(conversation_id, [])
+        for message in messages:
+            del self.messages[message["_id"]]
+            user_messages = self.by_user[message["user_id"]]
+            del user_messages[bisect.bisect_left(user_messages, _sort_key(message), key=_sort_key)]
+            if not user_messages:
+                del self.by_user[message["user_id"]]
+        self.latest.pop(conversation_id, None)
+        self.summary_state.pop(conversation_id, None)
+        return len(messages)
@@ -0,0 +1,23 @@
+import os
+from prometheus_client import multiprocess
+
+# Run the app under gunicorn with uvicorn workers:
+#   PROMETHEUS_MULTIPROC_DIR=/tmp/metrics gunicorn main:app
+# PROMETHEUS_MULTIPROC_DIR must be an empty directory, shared by the workers,
+# so /metrics on any worker reports the totals for all of them
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+def on_starting(server):
+    """Clear samples left over from a previous run"""
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,13 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import os
+import time
 import logging
 from config.database import Database
-from routes import chat_routes, summary_routes
+from config.metrics import MetricsMiddleware, render_metrics
+from routes import chat_routes, summary_routes, stats_routes, search_routes
+from services.summarizer import summary_pool, ensure_nltk_resources
+from services.subscriptions import message_broker
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Load NLTK resources at startup instead of on the first summary request
+SUMMARY_WARMUP = os.getenv("SUMMARY_WARMUP", "true").lower() in ("1", "true", "yes")
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -17,7 +26,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Chat API",
     description="A simple chat API with MongoDB storage and GPT-3.5 summarization",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -26,15 +36,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paging cursors travel in headers, which browsers hide unless exposed
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "X-Next-Offset"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(chat_routes.router, prefix="/api/v1", tags=["chats"])
 app.include_router(summary_routes.router, prefix="/api/v1", tags=["summaries"])
+app.include_router(stats_routes.router, prefix="/api/v1", tags=["stats"])
+app.include_router(search_routes.router, prefix="/api/v1", tags=["search"])
 
 @app.on_event("startup")
 async def startup_event():
     try:
+        timings = {}
+        start = time.perf_counter()
+        if SUMMARY_WARMUP:
+            timings["summarizer_warmup"] = summary_routes.summarizer.warmup()
+        else:
+            # Pool workers load NLTK data as they start, so report missing data here
+            ensure_nltk_resources()
+        step = time.perf_counter()
+        summary_pool.start()
+        timings["summary_pool"] = time.perf_counter() - step
+        step = time.perf_counter()
         await Database.connect_db()
+        timings["database"] = time.perf_counter() - step
+        message_broker.start()
+        if search_routes.search_index is not None:
+            step = time.perf_counter()
+            await search_routes.search_index.build()
+            timings["search_index"] = time.perf_counter() - step
+        timings["total"] = time.perf_counter() - start
+        app.state.startup_timings = timings
+        logger.info(
+            "Startup timings: " + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items())
+        )
         logger.info("Application startup completed successfully")
     except Exception as e:
         logger.error(f"Failed to initialize application: {str(e)}")
@@ -43,11 +80,20 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     try:
+        await message_broker.stop()
         await Database.close_db()
+        summary_pool.shutdown()
+        summary_routes.openai_summarizer.cache.close()
         logger.info("Application shutdown completed successfully")
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose metrics in the Prometheus text format"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/")
 async def root():
     return {
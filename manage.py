@@ -0,0 +1,57 @@
+import asyncio
+import argparse
+import logging
+from zoneinfo import ZoneInfo
+from config.database import Database
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def rebuild_conversations(args):
+    """Recompute the conversations collection from stored messages"""
+    count = await Database.rebuild_conversations()
+    print(f"✅ Rebuilt {count} conversations")
+
+async def migrate_timestamps(args):
+    """Convert legacy ISO-string timestamps to BSON datetimes in resumable batches"""
+    stats = await Database.migrate_string_timestamps(
+        batch_size=args.batch_size,
+        pause_seconds=args.pause_ms / 1000,
+        max_batches=args.max_batches,
+        restart=args.restart,
+        source_timezone=ZoneInfo(args.source_timezone)
+    )
+    print(f"✅ Converted {stats['converted']} timestamps ({stats['failed']} unparseable) in {stats['batches']} batches")
+    if stats["converted"]:
+        print("ℹ️ Run `python manage.py rebuild-conversations` to refresh conversation timestamps")
+
+COMMANDS = {
+    "rebuild-conversations": rebuild_conversations,
+    "migrate-timestamps": migrate_timestamps
+}
+
+async def main():
+    parser = argparse.ArgumentParser(description="Chat API maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild-conversations", help=rebuild_conversations.__doc__)
+    migrate = subparsers.add_parser("migrate-timestamps", help=migrate_timestamps.__doc__)
+    migrate.add_argument("--batch-size", type=int, default=1000, help="Documents rewritten per bulk_write")
+    migrate.add_argument("--pause-ms", type=float, default=100, help="Pause between batches to limit load")
+    migrate.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+    migrate.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start over")
+    migrate.add_argument(
+        "--source-timezone",
+        default="UTC",
+        help="IANA zone legacy strings were written in (the API host's local time, e.g. Europe/Berlin)"
+    )
+    args = parser.parse_args()
+
+    try:
+        await Database.connect_db()
+        await COMMANDS[args.command](args)
+    finally:
+        await Database.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
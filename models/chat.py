@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from bson import ObjectId
 
+# Upper bound on messages accepted by a single bulk request
+MAX_BULK_MESSAGES = 10000
+
 class ChatMessage(BaseModel):
     user_id: str
     message: str
@@ -15,8 +18,41 @@ class ChatResponse(BaseModel):
     message: str
     timestamp: str
 
+    @field_validator("timestamp", mode="before")
+    @classmethod
+    def render_timestamp(cls, value):
+        """Render stored BSON datetimes as ISO strings"""
+        return value.isoformat() if isinstance(value, datetime) else value
+
     class Config:
         json_encoders = {
             ObjectId: str
         }
-        populate_by_name = True 
\ No newline at end of file
+        populate_by_name = True
+
+class BulkChatRequest(BaseModel):
+    messages: List[ChatMessage] = Field(..., max_length=MAX_BULK_MESSAGES)
+
+class BulkChatItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    conversation_id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkChatResponse(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BulkChatItemResult]
+
+class ConversationListItem(BaseModel):
+    conversation_id: str
+    message_count: int
+    participants: List[str]
+    first_message_at: Optional[str] = None
+    last_message_at: Optional[str] = None
+    last_message_id: str
+    last_message_user_id: str
+    last_message_preview: str
+
+class SearchResult(ChatResponse):
+    score: float
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+class ParticipantStats(BaseModel):
+    user_id: str
+    message_count: int
+    first_message_at: Optional[str] = None
+    last_message_at: Optional[str] = None
+
+class ConversationStats(BaseModel):
+    conversation_id: str
+    message_count: int
+    participant_count: int
+    first_message_at: Optional[str] = None
+    last_message_at: Optional[str] = None
+    participants: List[ParticipantStats]
+
+class UserConversationStats(BaseModel):
+    conversation_id: str
+    message_count: int
+    first_message_at: Optional[str] = None
+    last_message_at: Optional[str] = None
+
+class UserStats(BaseModel):
+    user_id: str
+    message_count: int
+    conversation_count: int
+    first_message_at: Optional[str] = None
+    last_message_at: Optional[str] = None
+    conversations: List[UserConversationStats]
@@ -1,12 +1,33 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, Literal, List
 from datetime import datetime
+import os
+
+# Engine used when a request does not name one: "nltk" or "openai"
+SUMMARY_ENGINE = os.getenv("SUMMARY_ENGINE", "nltk")
+
+# Most conversations accepted by one batch summary request
+MAX_BATCH_CONVERSATIONS = 1000
 
 class SummaryRequest(BaseModel):
     conversation_id: str
     max_length: Optional[int] = 150
+    engine: Literal["nltk", "openai"] = SUMMARY_ENGINE
 
 class SummaryResponse(BaseModel):
     conversation_id: str
     summary: str
-    timestamp: str 
\ No newline at end of file
+    timestamp: str
+    engine: str = "nltk" 
+
+class BatchSummaryRequest(BaseModel):
+    conversation_ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_CONVERSATIONS)
+    max_length: Optional[int] = 150
+    engine: Literal["nltk", "openai"] = SUMMARY_ENGINE
+
+class BatchSummaryResult(BaseModel):
+    conversation_id: str
+    summary: Optional[str] = None
+    error: Optional[str] = None
+    timestamp: str
+    engine: str
@@ -1,15 +1,120 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response, Header
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional, AsyncIterator, Dict, Any
 from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+import os
+import asyncio
 import logging
-from config.database import Database
-from models.chat import ChatMessage, ChatResponse
+import orjson
+from config.database import Database, UnsupportedByBackend, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, utc_now
+from services.subscriptions import message_broker, OVERFLOW
+from routes.streaming import streaming_response
+from models.chat import (
+    ChatMessage, ChatResponse, BulkChatRequest, BulkChatItemResult, BulkChatResponse, ConversationListItem
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Stored fields needed to build a ChatResponse (the id comes from _id)
+RESPONSE_FIELDS = [field for field in ChatResponse.model_fields if field != "id"]
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json"
+}
+
+# Seconds between keepalive comments on an idle event stream
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+def _message_record(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a stored message like ChatResponse without building the model.
+
+    Read paths skip per-message validation: documents come from our own
+    writes, and orjson renders datetimes in the same ISO format as
+    ChatResponse. Keys follow ChatResponse's field order so the JSON is
+    byte-for-byte the same.
+    """
+    return {
+        "id": str(msg["_id"]),
+        "conversation_id": msg["conversation_id"],
+        "user_id": msg["user_id"],
+        "message": msg["message"],
+        "timestamp": msg["timestamp"]
+    }
+
+def _messages_response(messages: List[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """Render stored messages as a ChatResponse list.
+
+    Returning the response directly skips response_model validation; the
+    route's model still documents the schema.
+    """
+    return ORJSONResponse([_message_record(msg) for msg in messages], headers=headers)
+
+def _sse_message(msg: Dict[str, Any]) -> bytes:
+    """Format a stored message as a server-sent event, with its id as event id"""
+    record = _message_record(msg)
+    return b"id: %s\nevent: message\ndata: %s\n\n" % (record["id"].encode(), orjson.dumps(record))
+
+async def _stream_conversation_events(conversation_id: str, last_id: Optional[ObjectId]) -> AsyncIterator[bytes]:
+    """Push a conversation's new messages, after replaying any missed since ``last_id``"""
+    # Subscribe before replaying so nothing stored in between is missed
+    subscription = message_broker.subscribe(conversation_id)
+    try:
+        replayed = set()
+        if last_id is not None:
+            for msg in await Database.get_messages_after(conversation_id, last_id, fields=RESPONSE_FIELDS):
+                replayed.add(msg["_id"])
+                yield _sse_message(msg)
+        yield b"retry: %d\n\n" % int(SSE_KEEPALIVE_SECONDS * 1000)
+
+        while True:
+            try:
+                msg = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if msg is OVERFLOW:
+                # Too far behind; the client reconnects with Last-Event-ID to catch up
+                yield b"event: overflow\ndata: {}\n\n"
+                return
+            if msg["_id"] in replayed:
+                continue
+            yield _sse_message(msg)
+    finally:
+        message_broker.unsubscribe(subscription)
+
+async def _stream_user_messages(
+    user_id: str,
+    fmt: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    order: str = "asc"
+) -> AsyncIterator[bytes]:
+    """Serialize a user's messages as NDJSON lines or a JSON array, one at a time"""
+    first = True
+    if fmt == "json":
+        yield b"["
+    async for msg in Database.iter_user_messages(
+        user_id,
+        fields=RESPONSE_FIELDS,
+        since=since,
+        until=until,
+        order=order
+    ):
+        record = orjson.dumps(_message_record(msg))
+        if fmt == "ndjson":
+            yield record + b"\n"
+        else:
+            yield record if first else b"," + record
+        first = False
+    if fmt == "json":
+        yield b"]"
+
 @router.post("/chats", response_model=ChatResponse)
 async def create_message(message: ChatMessage):
     """Create a new chat message"""
@@ -26,7 +131,7 @@ async def create_message(message: ChatMessage):
         
         # Prepare message data
         message_data = message.dict()
-        message_data["timestamp"] = datetime.now().isoformat()
+        message_data["timestamp"] = utc_now()
         
         # Store message in database
         message_id = await Database.store_message(message_data)
@@ -45,54 +150,211 @@ async def create_message(message: ChatMessage):
         logger.error(f"Error creating message: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chats/bulk", response_model=BulkChatResponse)
+async def create_messages_bulk(request: BulkChatRequest):
+    """Create many chat messages in one request.
+
+    Every item is validated up front; invalid items are reported as failures
+    and the rest are written with unordered ``insert_many`` calls.
+    """
+    try:
+        results: List[Optional[BulkChatItemResult]] = [None] * len(request.messages)
+        pending_indexes = []
+        pending_data = []
+        timestamp = utc_now()
+        for index, message in enumerate(request.messages):
+            # Validate message content
+            if not message.message.strip():
+                results[index] = BulkChatItemResult(index=index, error="Message cannot be empty")
+                continue
+            if not message.user_id.strip():
+                results[index] = BulkChatItemResult(index=index, error="User ID cannot be empty")
+                continue
+
+            message_data = message.dict()
+            if not message_data["conversation_id"]:
+                message_data["conversation_id"] = f"conv_{ObjectId()}"
+            message_data["timestamp"] = timestamp
+            pending_indexes.append(index)
+            pending_data.append(message_data)
+
+        if pending_data:
+            stored = await Database.store_messages(pending_data)
+            for index, message_data, (message_id, error) in zip(pending_indexes, pending_data, stored):
+                results[index] = BulkChatItemResult(
+                    index=index,
+                    id=message_id,
+                    conversation_id=message_data["conversation_id"],
+                    error=error
+                )
+
+        failed = sum(1 for result in results if result.error)
+        logger.info(f"Bulk created {len(results) - failed} messages ({failed} failed)")
+        return BulkChatResponse(inserted=len(results) - failed, failed=failed, results=results)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating messages in bulk: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/chats/{conversation_id}", response_model=List[ChatResponse])
-async def get_conversation(conversation_id: str):
-    """Get all messages in a conversation"""
+async def get_conversation(
+    conversation_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor to continue after"),
+    before: Optional[str] = Query(None, description="Cursor to page back from"),
+    direction: str = Query("asc", pattern="^(asc|desc)$"),
+    since: Optional[datetime] = Query(None, description="Only messages at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only messages before this time")
+):
+    """Get a page of messages in a conversation.
+
+    Cursors for the adjacent pages are returned in the ``X-Next-Cursor`` and
+    ``X-Prev-Cursor`` response headers.
+    """
     try:
         # Validate conversation ID
         if not conversation_id.strip():
             raise HTTPException(status_code=400, detail="Conversation ID cannot be empty")
-            
-        messages = await Database.get_conversation(conversation_id)
-        if not messages:
+
+        messages, next_cursor, prev_cursor = await Database.get_conversation_page(
+            conversation_id,
+            limit=limit,
+            after=after,
+            before=before,
+            direction=direction,
+            fields=RESPONSE_FIELDS,
+            since=since,
+            until=until
+        )
+        if not messages and not (after or before or since or until):
             raise HTTPException(status_code=404, detail="Conversation not found")
-        
-        # Convert MongoDB documents to response models
-        responses = []
-        for msg in messages:
-            msg["id"] = str(msg.pop("_id"))
-            responses.append(ChatResponse(**msg))
-            
-        return responses
+
+        headers = {}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        if prev_cursor:
+            headers["X-Prev-Cursor"] = prev_cursor
+
+        return _messages_response(messages, headers)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting conversation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/chats/{conversation_id}/events")
+async def subscribe_conversation(
+    conversation_id: str,
+    last_event_id: Optional[str] = Header(None, description="Resume after this message id"),
+    last_event_id_param: Optional[str] = Query(
+        None,
+        alias="last_event_id",
+        description="Resume after this message id (for clients that cannot set headers)"
+    )
+):
+    """Stream a conversation's new messages as server-sent events.
+
+    Each message is a ``message`` event whose id is the message id; on
+    reconnect, browsers send it back as Last-Event-ID and any messages missed
+    in between are replayed. A client that falls too far behind receives an
+    ``overflow`` event and the stream ends.
+    """
+    try:
+        # Validate conversation ID
+        if not conversation_id.strip():
+            raise HTTPException(status_code=400, detail="Conversation ID cannot be empty")
+
+        resume_from = last_event_id or last_event_id_param
+        try:
+            last_id = ObjectId(resume_from) if resume_from else None
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid event id")
+
+        return streaming_response(
+            _stream_conversation_events(conversation_id, last_id),
+            "conversation events",
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error subscribing to conversation: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/users/{user_id}/chats", response_model=List[ChatResponse])
-async def get_user_messages(user_id: str):
-    """Get all messages for a user"""
+async def get_user_messages(
+    user_id: str,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
+    since: Optional[datetime] = Query(None, description="Only messages at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only messages before this time"),
+    order: str = Query("asc", pattern="^(asc|desc)$")
+):
+    """Get messages for a user, ordered by timestamp.
+
+    With ``stream=ndjson`` or ``stream=json`` the messages are streamed from
+    the database cursor instead of being loaded into memory first.
+    """
     try:
         # Validate user ID
         if not user_id.strip():
             raise HTTPException(status_code=400, detail="User ID cannot be empty")
+
+        if stream:
+            return streaming_response(
+                _stream_user_messages(user_id, stream, since, until, order),
+                "user messages",
+                media_type=STREAM_MEDIA_TYPES[stream]
+            )
             
-        messages = await Database.get_user_messages(user_id)
+        messages = await Database.get_user_messages(
+            user_id,
+            fields=RESPONSE_FIELDS,
+            since=since,
+            until=until,
+            order=order
+        )
         
-        # Convert MongoDB documents to response models
-        responses = []
-        for msg in messages:
-            msg["id"] = str(msg.pop("_id"))
-            responses.append(ChatResponse(**msg))
-            
-        return responses
+        return _messages_response(messages)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting user messages: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/users/{user_id}/conversations", response_model=List[ConversationListItem])
+async def get_user_conversations(
+    user_id: str,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor to continue after")
+):
+    """Get a user's conversations, most recently active first.
+
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header.
+    """
+    try:
+        # Validate user ID
+        if not user_id.strip():
+            raise HTTPException(status_code=400, detail="User ID cannot be empty")
+
+        conversations, next_cursor = await Database.get_user_conversations(user_id, limit=limit, after=after)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return conversations
+    except HTTPException:
+        raise
+    except UnsupportedByBackend as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting user conversations: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/chats/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation and all its messages"""
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
+import logging
+from config.database import Database, UnsupportedByBackend, SEARCH_BACKEND, MAX_PAGE_SIZE
+from models.chat import SearchResult
+from services.search_index import InvertedIndex
+from routes.summary_routes import summarizer
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Deepest result reachable by offset paging; relevance order has no keyset cursor
+MAX_SEARCH_OFFSET = 10000
+
+# The in-process index shares the summarizer's stopwords and lemmatizer
+search_index = InvertedIndex(summarizer) if SEARCH_BACKEND == "memory" else None
+
+@router.get("/search", response_model=List[SearchResult])
+async def search_messages(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Search terms"),
+    user_id: Optional[str] = None,
+    conversation_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET)
+):
+    """Search message text, most relevant first.
+
+    Optionally scoped to a user or conversation. When a further page exists
+    its offset is returned in the X-Next-Offset header.
+    """
+    try:
+        # Validate query
+        if not q.strip():
+            raise HTTPException(status_code=400, detail="Search query cannot be empty")
+
+        if search_index is not None:
+            ranked = await search_index.search(
+                q, user_id=user_id, conversation_id=conversation_id, limit=limit, offset=offset
+            )
+            messages = await Database.get_messages_by_ids([message_id for message_id, _ in ranked])
+            scores = dict(ranked)
+            if len(messages) < len(ranked):
+                # Deleted by another worker; drop them from the index before the next search
+                search_index.mark_stale(scores.keys() - {msg["_id"] for msg in messages})
+            for msg in messages:
+                msg["score"] = scores[msg["_id"]]
+        else:
+            messages = await Database.search_messages(
+                q, user_id=user_id, conversation_id=conversation_id, limit=limit, offset=offset
+            )
+
+        if len(messages) == limit and offset + limit <= MAX_SEARCH_OFFSET:
+            response.headers["X-Next-Offset"] = str(offset + limit)
+
+        return [
+            SearchResult(
+                id=str(msg["_id"]),
+                conversation_id=msg["conversation_id"],
+                user_id=msg["user_id"],
+                message=msg["message"],
+                timestamp=msg["timestamp"],
+                score=msg["score"]
+            )
+            for msg in messages
+        ]
+    except HTTPException:
+        raise
+    except UnsupportedByBackend as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching messages: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
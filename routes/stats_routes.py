@@ -0,0 +1,72 @@
+from fastapi import APIRouter, HTTPException, Query
+import os
+import logging
+from config.database import Database, UnsupportedByBackend
+from models.stats import ConversationStats, UserStats
+from services.summary_cache import SummaryCache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Stats are cached briefly; set STATS_CACHE_TTL_SECONDS=0 to always aggregate
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "30"))
+stats_cache = SummaryCache(max_size=int(os.getenv("STATS_CACHE_SIZE", "1024")), ttl=STATS_CACHE_TTL_SECONDS)
+
+# Conversation stats are dropped on write; user stats rely on the TTL
+Database.add_change_listener(lambda conversation_id: stats_cache.invalidate(f"conversation:{conversation_id}"))
+
+@router.get("/chats/{conversation_id}/stats", response_model=ConversationStats)
+async def get_conversation_stats(conversation_id: str, fresh: bool = False):
+    """Get message counts, participants and first/last timestamps for a conversation"""
+    try:
+        # Validate conversation ID
+        if not conversation_id.strip():
+            raise HTTPException(status_code=400, detail="Conversation ID cannot be empty")
+
+        key = f"conversation:{conversation_id}"
+        stats = None if fresh or not STATS_CACHE_TTL_SECONDS else stats_cache.get(key, None)
+        if stats is None:
+            stats = await Database.get_conversation_stats(conversation_id)
+            if stats is None:
+                raise HTTPException(status_code=404, detail="Conversation not found")
+            if STATS_CACHE_TTL_SECONDS:
+                stats_cache.put(key, None, stats)
+        return stats
+    except HTTPException:
+        raise
+    except UnsupportedByBackend as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting conversation stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/users/{user_id}/stats", response_model=UserStats)
+async def get_user_stats(
+    user_id: str,
+    top: int = Query(20, ge=0, le=1000, description="Busiest conversations to include"),
+    fresh: bool = False
+):
+    """Get a user's message volume, overall and per conversation"""
+    try:
+        # Validate user ID
+        if not user_id.strip():
+            raise HTTPException(status_code=400, detail="User ID cannot be empty")
+
+        key = f"user:{user_id}:{top}"
+        stats = None if fresh or not STATS_CACHE_TTL_SECONDS else stats_cache.get(key, None)
+        if stats is None:
+            stats = await Database.get_user_stats(user_id, top_conversations=top)
+            if stats is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            if STATS_CACHE_TTL_SECONDS:
+                stats_cache.put(key, None, stats)
+        return stats
+    except HTTPException:
+        raise
+    except UnsupportedByBackend as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting user stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
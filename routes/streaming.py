@@ -0,0 +1,24 @@
+from fastapi.responses import StreamingResponse
+from typing import AsyncGenerator, Union
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+async def _log_stream_errors(body: AsyncGenerator[Union[bytes, str], None], description: str) -> AsyncGenerator[Union[bytes, str], None]:
+    """Pass ``body`` through, logging the error that ends it early"""
+    try:
+        async for chunk in body:
+            yield chunk
+    except Exception as e:
+        # Headers are already sent once the body starts, so an error can
+        # only cut the stream short; log it since the client cannot see it
+        logger.error(f"Error streaming {description}: {str(e)}")
+        raise
+    finally:
+        # Run the body's own cleanup now if the client went away mid-stream
+        await body.aclose()
+
+def streaming_response(body: AsyncGenerator[Union[bytes, str], None], description: str, **kwargs) -> StreamingResponse:
+    """Stream ``body``, logging any error raised after the response has started"""
+    return StreamingResponse(_log_stream_errors(body, description), **kwargs)
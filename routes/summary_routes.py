@@ -1,22 +1,40 @@
 from fastapi import APIRouter, HTTPException
-from services.summarizer import Summarizer
-from models.summary import SummaryRequest, SummaryResponse
+from services.summarizer import Summarizer, SUMMARY_FIELDS
+from services.summarization import SummarizationService, SummarizationError
+from services.summary_pool import SummarizerBusyError
+from services.summary_cache import summary_cache
+from models.summary import SummaryRequest, SummaryResponse, BatchSummaryRequest, BatchSummaryResult
+from config.database import Database
+from routes.streaming import streaming_response
 from datetime import datetime
+from typing import AsyncIterator
+import os
+import asyncio
 import logging
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+
+# Conversations summarized at once by a batch request
+SUMMARY_BATCH_CONCURRENCY = int(os.getenv("SUMMARY_BATCH_CONCURRENCY", "8"))
 summarizer = Summarizer()
+openai_summarizer = SummarizationService()
+
+# Summarization engines selectable per request
+ENGINES = {
+    "nltk": summarizer,
+    "openai": openai_summarizer,
+}
 
 @router.post("/summarize", response_model=SummaryResponse)
 async def create_summary(request: SummaryRequest):
     """Create a summary for a conversation"""
     try:
-        logger.info("Received summary request for conversation: %s", request.conversation_id)
+        logger.info("Received %s summary request for conversation: %s", request.engine, request.conversation_id)
         
-        summary = await summarizer.summarize_conversation(
+        summary = await ENGINES[request.engine].summarize_conversation(
             request.conversation_id,
             request.max_length
         )
@@ -24,15 +42,92 @@ async def create_summary(request: SummaryRequest):
         response = SummaryResponse(
             conversation_id=request.conversation_id,
             summary=summary,
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now().isoformat(),
+            engine=request.engine
         )
         
         logger.info("Successfully created summary for conversation: %s", request.conversation_id)
         return response
         
+    except SummarizerBusyError as e:
+        logger.warning("Summarizer busy: %s", str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except SummarizationError as e:
+        logger.error("Summary engine error: %s", str(e))
+        raise HTTPException(status_code=502, detail=str(e))
     except ValueError as e:
         logger.error("Validation error: %s", str(e))
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Error creating summary: %s", str(e))
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _stream_batch_summaries(request: BatchSummaryRequest) -> AsyncIterator[str]:
+    """Summarize conversations as their messages arrive, yielding NDJSON results as they complete"""
+    engine = ENGINES[request.engine]
+    conversation_ids = list(dict.fromkeys(request.conversation_ids))
+    results: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(SUMMARY_BATCH_CONCURRENCY)
+    tasks = []
+
+    def result(conversation_id: str, **fields) -> BatchSummaryResult:
+        return BatchSummaryResult(
+            conversation_id=conversation_id,
+            timestamp=datetime.now().isoformat(),
+            engine=request.engine,
+            **fields
+        )
+
+    async def summarize_one(conversation_id: str, messages: list) -> None:
+        try:
+            summary = await engine.summarize_messages(conversation_id, messages, request.max_length)
+            await results.put(result(conversation_id, summary=summary))
+        except Exception as e:
+            logger.error("Error summarizing conversation %s: %s", conversation_id, str(e))
+            await results.put(result(conversation_id, error=str(e)))
+        finally:
+            semaphore.release()
+
+    async def produce() -> None:
+        try:
+            # One query for every conversation; reading pauses while all slots are busy
+            seen = set()
+            async for conversation_id, messages in Database.iter_conversations(conversation_ids, fields=SUMMARY_FIELDS):
+                seen.add(conversation_id)
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(summarize_one(conversation_id, messages)))
+            for conversation_id in conversation_ids:
+                if conversation_id not in seen:
+                    await results.put(result(conversation_id, error=f"No messages found for conversation {conversation_id}"))
+            await asyncio.gather(*tasks)
+        finally:
+            await results.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await results.get()) is not None:
+            yield item.model_dump_json() + "\n"
+        await producer
+    finally:
+        for task in [producer, *tasks]:
+            task.cancel()
+
+@router.post("/summarize/batch")
+async def create_batch_summary(request: BatchSummaryRequest):
+    """Summarize many conversations, streaming one NDJSON result per conversation as each completes"""
+    logger.info("Received %s batch summary request for %d conversations", request.engine, len(request.conversation_ids))
+    return streaming_response(_stream_batch_summaries(request), "batch summaries", media_type="application/x-ndjson")
+
+@router.get("/summarize/cache/stats")
+async def get_summary_cache_stats():
+    """Get summary cache hit/miss/eviction counters"""
+    return summary_cache.stats()
+
+@router.get("/summarize/completion-cache/stats")
+async def get_completion_cache_stats():
+    """Get OpenAI completion cache size and hit/miss counters across all workers"""
+    try:
+        return await openai_summarizer.cache.stats()
+    except Exception as e:
+        logger.error("Error reading completion cache stats: %s", str(e))
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,8 @@
 # Services package initialization
 from .summarizer import Summarizer
+from .summary_cache import SummaryCache, summary_cache
+from .summary_pool import SummaryPool, SummarizerBusyError
+from .summarization import SummarizationService, SummarizationError
+from .subscriptions import MessageBroker, Subscription, message_broker
 
-__all__ = ['Summarizer'] 
\ No newline at end of file
+__all__ = ['Summarizer', 'SummaryCache', 'summary_cache', 'SummaryPool', 'SummarizerBusyError', 'SummarizationService', 'SummarizationError', 'MessageBroker', 'Subscription', 'message_broker'] 
\ No newline at end of file
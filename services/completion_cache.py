@@ -0,0 +1,150 @@
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+COMPLETION_CACHE_PATH = os.getenv("COMPLETION_CACHE_PATH", os.path.join(".cache", "completions.db"))
+COMPLETION_CACHE_SIZE = int(os.getenv("COMPLETION_CACHE_SIZE", "10000"))
+COMPLETION_CACHE_TTL_SECONDS = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_accessed_at ON completions (accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class CompletionCache:
+    """Persistent, content-addressed cache of LLM completions in SQLite.
+
+    The database file is shared by every worker on the host (WAL mode lets
+    readers and a writer proceed together) and survives restarts. Entries
+    expire ``ttl`` seconds after being written, and the least recently used
+    entries are evicted beyond ``max_size``. Hit/miss counters are stored in
+    the same file, so they cover all workers.
+    """
+
+    def __init__(
+        self,
+        path: str = COMPLETION_CACHE_PATH,
+        max_size: int = COMPLETION_CACHE_SIZE,
+        ttl: float = COMPLETION_CACHE_TTL_SECONDS
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use, so forked workers get their own connection"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            logger.info(f"Opened completion cache at {self.path}")
+        return self._conn
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT value, created_at FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._count(conn, "misses")
+                    return None
+                value, created_at = row
+                if now - created_at > self.ttl:
+                    conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._count(conn, "expirations")
+                    self._count(conn, "misses")
+                    return None
+                conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+                self._count(conn, "hits")
+                return value
+
+    def _put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                (size,) = conn.execute("SELECT COUNT(*) FROM completions").fetchone()
+                if size > self.max_size:
+                    evicted = conn.execute(
+                        "DELETE FROM completions WHERE key IN "
+                        "(SELECT key FROM completions ORDER BY accessed_at LIMIT ?)",
+                        (size - self.max_size,)
+                    ).rowcount
+                    self._count(conn, "evictions", evicted)
+
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            (size,) = conn.execute("SELECT COUNT(*) FROM completions").fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "path": self.path,
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "evictions": counters.get("evictions", 0),
+            "expirations": counters.get("expirations", 0),
+        }
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for ``key``, or None on a miss"""
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, value: str) -> None:
+        """Store a completion, evicting the least recently used entries if full"""
+        await asyncio.to_thread(self._put, key, value)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Return entry count and hit/miss/eviction counters across all workers"""
+        return await asyncio.to_thread(self._stats)
+
+    def close(self) -> None:
+        """Close this process's connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
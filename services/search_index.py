@@ -0,0 +1,223 @@
+import os
+import math
+import asyncio
+import time
+import heapq
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple, Any, Iterable
+from bson import ObjectId
+from nltk.tokenize import word_tokenize
+from config.database import Database
+from services.summarizer import SUMMARY_SETTLE_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between catch-up reads of messages stored by other workers (0 disables)
+SEARCH_REFRESH_SECONDS = float(os.getenv("SEARCH_REFRESH_SECONDS", "30"))
+
+INDEX_FIELDS = ["conversation_id", "user_id", "message"]
+
+class InvertedIndex:
+    """In-process TF-IDF search index over messages.
+
+    Used when the database offers no text index. Terms are produced with the
+    summarizer's stopword list and lemmatizer, so search and summaries agree
+    on what a word is. Writes only mark their conversation as dirty (via the
+    Database change listeners); dirty conversations are re-synced from the
+    database before the next search.
+
+    Each worker process holds its own index and only hears about its own
+    writes. Messages stored by other workers are picked up by a catch-up read
+    every SEARCH_REFRESH_SECONDS, and messages they deleted are dropped when
+    a search finds them missing, so results may lag other workers by that
+    long. Incremental reads overlap the last indexed id by
+    SUMMARY_SETTLE_SECONDS, so ObjectIds that arrive out of order because of
+    clock skew are still indexed.
+
+    Building, refreshing and syncing await the database between changes, so
+    they run one at a time under a lock, and searches rank while holding it
+    so they never see a half-applied update.
+    """
+
+    def __init__(self, summarizer, refresh_seconds: float = SEARCH_REFRESH_SECONDS):
+        self.summarizer = summarizer
+        self.refresh_seconds = refresh_seconds
+        self.postings: Dict[str, Dict[ObjectId, int]] = {}
+        self.documents: Dict[ObjectId, Tuple[str, str, List[str]]] = {}
+        self.conversations: Dict[str, Set[ObjectId]] = {}
+        self.users: Dict[str, Set[ObjectId]] = {}
+        self.dirty: Set[str] = set()
+        self.latest_id: Optional[ObjectId] = None
+        self.refreshed_at = 0.0
+        self.built = False
+        self._lock = asyncio.Lock()
+        Database.add_change_listener(self.dirty.add)
+
+    def analyze(self, text: str) -> List[str]:
+        """Split text into lemmatized, stopword-free terms"""
+        stop_words = self.summarizer.stop_words
+        lemmatizer = self.summarizer.lemmatizer
+        return [
+            lemmatizer.lemmatize(token)
+            for token in word_tokenize(text.lower())
+            if token.isalnum() and token not in stop_words
+        ]
+
+    def add(self, msg: Dict[str, Any]) -> None:
+        """Index one message"""
+        message_id = msg["_id"]
+        if message_id in self.documents:
+            return
+        terms = self.analyze(msg["message"])
+        self.documents[message_id] = (msg["conversation_id"], msg["user_id"], terms)
+        self.conversations.setdefault(msg["conversation_id"], set()).add(message_id)
+        self.users.setdefault(msg["user_id"], set()).add(message_id)
+        if self.latest_id is None or message_id > self.latest_id:
+            self.latest_id = message_id
+        for term in terms:
+            postings = self.postings.setdefault(term, {})
+            postings[message_id] = postings.get(message_id, 0) + 1
+
+    def remove_conversation(self, conversation_id: str) -> None:
+        """Drop every indexed message of a conversation"""
+        for message_id in self.conversations.pop(conversation_id, set()):
+            _, user_id, terms = self.documents.pop(message_id)
+            user_messages = self.users[user_id]
+            user_messages.discard(message_id)
+            if not user_messages:
+                del self.users[user_id]
+            for term in set(terms):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(message_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def mark_stale(self, message_ids: Iterable[ObjectId]) -> None:
+        """Re-sync the conversations of indexed messages the database no longer has"""
+        for message_id in message_ids:
+            document = self.documents.get(message_id)
+            if document is not None:
+                self.dirty.add(document[0])
+
+    def _overlap_start(self, message_id: ObjectId) -> ObjectId:
+        """The smallest ObjectId inside the settle window before ``message_id``"""
+        return ObjectId.from_datetime(message_id.generation_time - timedelta(seconds=SUMMARY_SETTLE_SECONDS))
+
+    async def build(self) -> None:
+        """Index every stored message"""
+        async with self._lock:
+            await self._build()
+
+    async def refresh(self) -> None:
+        """Index messages stored anywhere since the newest one indexed, including other workers' writes"""
+        async with self._lock:
+            await self._refresh()
+
+    async def sync(self) -> None:
+        """Bring dirty conversations up to date with the database"""
+        async with self._lock:
+            await self._sync()
+
+    async def _build(self) -> None:
+        self.postings.clear()
+        self.documents.clear()
+        self.conversations.clear()
+        self.users.clear()
+        self.dirty.clear()
+        self.latest_id = None
+        async for msg in Database.iter_messages(fields=INDEX_FIELDS):
+            self.add(msg)
+        self.built = True
+        self.refreshed_at = time.monotonic()
+        logger.info(f"Built search index over {len(self.documents)} messages ({len(self.postings)} terms)")
+
+    async def _refresh(self) -> None:
+        since_id = self._overlap_start(self.latest_id) if self.latest_id is not None else None
+        count = len(self.documents)
+        async for msg in Database.iter_messages(fields=INDEX_FIELDS, since_id=since_id):
+            self.add(msg)
+        self.refreshed_at = time.monotonic()
+        if len(self.documents) > count:
+            logger.info(f"Search index caught up on {len(self.documents) - count} messages")
+
+    async def _sync(self) -> None:
+        while self.dirty:
+            conversation_id = self.dirty.pop()
+            if await Database.get_conversation_version(conversation_id) is None:
+                self.remove_conversation(conversation_id)
+                continue
+            indexed = self.conversations.get(conversation_id)
+            new_messages = await Database.get_messages_after(
+                conversation_id,
+                max(indexed) if indexed else None,
+                overlap_seconds=SUMMARY_SETTLE_SECONDS,
+                fields=INDEX_FIELDS
+            )
+            for msg in new_messages:
+                self.add(msg)
+
+    def _scope(self, user_id: Optional[str], conversation_id: Optional[str]) -> Optional[Set[ObjectId]]:
+        """The indexed messages a scoped search may return, or None when unscoped"""
+        scopes = []
+        if conversation_id:
+            scopes.append(self.conversations.get(conversation_id, set()))
+        if user_id:
+            scopes.append(self.users.get(user_id, set()))
+        if not scopes:
+            return None
+        if len(scopes) == 1:
+            return scopes[0]
+        smaller, larger = sorted(scopes, key=len)
+        return {message_id for message_id in smaller if message_id in larger}
+
+    async def search(
+        self,
+        text: str,
+        user_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Tuple[ObjectId, float]]:
+        """Return (message id, score) pairs ranked by TF-IDF relevance.
+
+        Scoped searches walk whichever is smaller of the term's postings and
+        the messages in scope, so they stay cheap on a large index.
+        """
+        async with self._lock:
+            if not self.built:
+                await self._build()
+            elif self.refresh_seconds and time.monotonic() - self.refreshed_at >= self.refresh_seconds:
+                await self._refresh()
+            await self._sync()
+            # Ranking does not await, so it reads the index exactly as synced
+            return self._rank(text, self._scope(user_id, conversation_id), limit, offset)
+
+    def _rank(
+        self,
+        text: str,
+        scope: Optional[Set[ObjectId]],
+        limit: int,
+        offset: int
+    ) -> List[Tuple[ObjectId, float]]:
+        """Score the indexed messages in ``scope`` against ``text``"""
+        scores: Dict[ObjectId, float] = {}
+        total = len(self.documents) or 1
+        for term in set(self.analyze(text)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + total / len(postings))
+            if scope is None:
+                matches = postings.items()
+            elif len(scope) < len(postings):
+                matches = ((message_id, postings[message_id]) for message_id in scope if message_id in postings)
+            else:
+                matches = ((message_id, tf) for message_id, tf in postings.items() if message_id in scope)
+            for message_id, tf in matches:
+                scores[message_id] = scores.get(message_id, 0.0) + (1 + math.log(tf)) * idf
+
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return ranked[offset:]
@@ -0,0 +1,150 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Set, Optional, Any
+from pymongo.errors import OperationFailure
+from config.database import Database
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Messages buffered per subscriber before it is treated as too slow
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "100"))
+# Bridge workers through MongoDB change streams (requires a replica set)
+SUBSCRIPTIONS_CHANGE_STREAMS = os.getenv("SUBSCRIPTIONS_CHANGE_STREAMS", "false").lower() in ("1", "true", "yes")
+# Longest wait between attempts to reopen a failed change stream
+CHANGE_STREAM_MAX_BACKOFF_SECONDS = 60
+
+# MongoDB error code for change streams on a server that is not a replica set
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+# Queued in place of the backlog when a subscriber falls behind
+OVERFLOW = object()
+
+class Subscription:
+    """One subscriber's bounded queue of new messages for a conversation"""
+
+    def __init__(self, conversation_id: str, max_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.conversation_id = conversation_id
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+        self.overflowed = False
+
+    def push(self, message: Dict[str, Any]) -> None:
+        """Queue a message without blocking the publisher.
+
+        A full queue means the consumer cannot keep up: its backlog is
+        dropped and replaced by OVERFLOW, after which it gets nothing more.
+        The consumer is expected to reconnect and catch up from the database.
+        """
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self) -> Any:
+        """Wait for the next message, or OVERFLOW"""
+        return await self.queue.get()
+
+class MessageBroker:
+    """In-process fan-out of newly stored messages to per-conversation subscribers.
+
+    By default messages are published straight from Database message
+    listeners, so subscribers see writes made by this worker. With
+    SUBSCRIPTIONS_CHANGE_STREAMS enabled, messages come from a MongoDB change
+    stream instead and every worker sees every write.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, change_streams: bool = SUBSCRIPTIONS_CHANGE_STREAMS):
+        self.queue_size = queue_size
+        self.change_streams = change_streams
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, conversation_id: str) -> Subscription:
+        """Start receiving a conversation's new messages"""
+        subscription = Subscription(conversation_id, self.queue_size)
+        self.subscribers.setdefault(conversation_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop receiving messages"""
+        subscribers = self.subscribers.get(subscription.conversation_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscribers[subscription.conversation_id]
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        """Deliver a stored message to its conversation's subscribers"""
+        for subscription in list(self.subscribers.get(message.get("conversation_id"), ())):
+            subscription.push(message)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return subscriber counts"""
+        return {
+            "conversations": len(self.subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self.subscribers.values()),
+            "change_streams": self._watch_task is not None and not self._watch_task.done(),
+        }
+
+    async def _watch(self) -> None:
+        """Publish inserts seen on the messages change stream, resuming after errors.
+
+        Failures are retried with exponential backoff. If the server cannot
+        run change streams at all, the broker falls back to this worker's
+        own writes after a single warning.
+        """
+        resume_token = None
+        delay = 1.0
+        while True:
+            try:
+                async with await Database.watch_messages(resume_token) as stream:
+                    delay = 1.0
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self.publish(change["fullDocument"])
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    self._fall_back(f"MongoDB does not support change streams here ({str(e)})")
+                    return
+                logger.error(f"Message change stream failed, retrying in {delay:.0f}s: {str(e)}")
+            except Exception as e:
+                logger.error(f"Message change stream failed, retrying in {delay:.0f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CHANGE_STREAM_MAX_BACKOFF_SECONDS)
+
+    def _fall_back(self, reason: str) -> None:
+        """Publish only this worker's writes, because change streams are unavailable"""
+        logger.warning(f"Change streams disabled: {reason}; subscribers only see this worker's writes")
+        Database.add_message_listener(self.publish)
+
+    def start(self) -> None:
+        """Begin publishing stored messages"""
+        if self.change_streams and not Database.supports("watch_messages"):
+            self._fall_back(f"the {type(Database.backend).__name__} storage backend has no change stream")
+        elif self.change_streams:
+            if self._watch_task is None:
+                self._watch_task = asyncio.create_task(self._watch())
+                logger.info("Publishing messages from MongoDB change streams")
+        else:
+            Database.add_message_listener(self.publish)
+
+    async def stop(self) -> None:
+        """Stop publishing"""
+        Database.remove_message_listener(self.publish)
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+message_broker = MessageBroker()
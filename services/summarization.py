@@ -1,97 +1,251 @@
 import os
+import json
+import math
+import random
+import hashlib
+import asyncio
+import logging
+import httpx
 import openai
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from config.database import Database
+from config.metrics import SUMMARY_STAGE_SECONDS
+from services.summary_pool import SummarizerBusyError
+from services.completion_cache import CompletionCache
 
 load_dotenv()
 
+# Set up logging
+logger = logging.getLogger(__name__)
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+# Concurrent requests to the OpenAI API per process
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))
+# Per-request timeout, in seconds
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+# Retries on rate limits, timeouts and server errors, with exponential backoff
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+OPENAI_BACKOFF_BASE_SECONDS = float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", "0.5"))
+OPENAI_BACKOFF_MAX_SECONDS = float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", "20"))
+
+# Errors worth retrying: the request may succeed if sent again later
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# Long conversations are summarized in windows of this many prompt tokens,
+# then the partial summaries (each at most SUMMARY_CHUNK_TOKENS) are reduced
+SUMMARY_WINDOW_TOKENS = int(os.getenv("SUMMARY_WINDOW_TOKENS", "3000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "200"))
+# Rough characters per token, used to estimate prompt size without a tokenizer
+CHARS_PER_TOKEN = 4
+
+SYSTEM_PROMPT = "You are a helpful assistant that summarizes conversations."
+PROMPTS = {
+    "conversation": "Please summarize this conversation:\n{text}",
+    "combine": (
+        "These are summaries of consecutive parts of one conversation, in order. "
+        "Combine them into a single summary of the whole conversation:\n{text}"
+    ),
+}
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of tokens in ``text``"""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+def pack_windows(items: List[str], budget: int) -> List[List[str]]:
+    """Greedily pack items, in order, into windows of at most ``budget`` tokens.
+
+    Packing starts from the first item, so appending items never changes any
+    window but the last. An item larger than the budget is truncated.
+    """
+    windows: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for item in items:
+        tokens = estimate_tokens(item)
+        if tokens > budget:
+            item = item[:budget * CHARS_PER_TOKEN]
+            tokens = budget
+        if current and used + tokens > budget:
+            windows.append(current)
+            current = []
+            used = 0
+        current.append(item)
+        used += tokens
+    if current:
+        windows.append(current)
+    return windows
+
+class SummarizationError(Exception):
+    """Raised when the OpenAI API rejects or fails a summary request"""
+
 class SummarizationService:
-    def __init__(self):
-        """Initialize OpenAI client"""
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+    """Summarize conversations with the OpenAI chat completions API.
+
+    Requests go through the async client, so the event loop keeps serving
+    while a completion is in flight. A semaphore caps concurrent requests and
+    retryable failures are retried with jittered exponential backoff,
+    honouring the server's Retry-After header when present.
+
+    Conversations too long for one prompt are summarized map-reduce style:
+    token-budgeted windows are summarized concurrently, and the partial
+    summaries are combined level by level until one remains. Every completion
+    is stored in a persistent cache keyed by a hash of the model, prompt and
+    max_tokens, and windows are packed from the start, so after new messages
+    arrive only the tail window and the summaries above it are requested
+    again, and unchanged conversations cost no request at all.
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        cache: Optional[CompletionCache] = None,
+        model: str = OPENAI_MODEL,
+        max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+        timeout: float = OPENAI_TIMEOUT_SECONDS,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        backoff_base: float = OPENAI_BACKOFF_BASE_SECONDS,
+        backoff_max: float = OPENAI_BACKOFF_MAX_SECONDS,
+        window_tokens: int = SUMMARY_WINDOW_TOKENS,
+        chunk_tokens: int = SUMMARY_CHUNK_TOKENS
+    ):
+        """Initialize the service; the OpenAI client is created on first use"""
+        if window_tokens < 2 * chunk_tokens:
+            # Each reduce window must fit two partial summaries to make progress
+            raise ValueError("SUMMARY_WINDOW_TOKENS must be at least twice SUMMARY_CHUNK_TOKENS")
+        self._client = client
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.window_tokens = window_tokens
+        self.chunk_tokens = chunk_tokens
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache or CompletionCache()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            # Retries are handled here, so the client's own are disabled. The
+            # HTTP client is built here because openai's default passes
+            # arguments that newer httpx releases no longer accept
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+            )
+        return self._client
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before retry number ``attempt``"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        """Run one chat completion with concurrency limits and retries"""
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    with SUMMARY_STAGE_SECONDS.labels("completion").time():
+                        response = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=0.7,
+                            timeout=self.timeout
+                        )
+                return response.choices[0].message.content.strip()
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    if isinstance(e, openai.RateLimitError):
+                        raise SummarizerBusyError("OpenAI rate limit exceeded, try again later") from e
+                    raise SummarizationError(f"OpenAI request failed: {str(e)}") from e
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                logger.warning(f"OpenAI request failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except openai.APIError as e:
+                raise SummarizationError(f"OpenAI request failed: {str(e)}") from e
 
-    async def generate_summary(self, messages):
+    async def _summarize(self, kind: str, lines: List[str], max_tokens: int) -> str:
+        """Summarize one window with the ``kind`` prompt, reusing a cached completion"""
+        prompt = PROMPTS[kind].format(text="\n".join(lines))
+        key = hashlib.sha256(json.dumps([self.model, SYSTEM_PROMPT, prompt, max_tokens]).encode()).hexdigest()
+        try:
+            cached = await self.cache.get(key)
+        except Exception as e:
+            logger.error(f"Error reading completion cache: {str(e)}")
+            cached = None
+        if cached is not None:
+            return cached
+
+        summary = await self._complete(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens
+        )
+        try:
+            await self.cache.put(key, summary)
+        except Exception as e:
+            logger.error(f"Error writing completion cache: {str(e)}")
+        return summary
+
+    async def generate_summary(self, messages: List[Dict[str, Any]], max_tokens: int = 150) -> str:
         """Generate a summary of the chat messages using OpenAI"""
         if not messages:
             return "No messages to summarize"
 
         # Format messages for the prompt
-        formatted_messages = "\n".join([
+        formatted_messages = [
             f"{msg['user_id']}: {msg['message']}"
             for msg in messages
-        ])
+        ]
 
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes conversations."},
-                    {"role": "user", "content": f"Please summarize this conversation:\n{formatted_messages}"}
-                ],
-                max_tokens=150,
-                temperature=0.7
-            )
-            return response.choices[0].message['content'].strip()
-        except Exception as e:
-            print(f"Error generating summary: {str(e)}")
-            return "Error generating summary"
-
-    async def generate_summary_old(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """
-        Generate a summary of the chat conversation using OpenAI's GPT model.
-        
-        Args:
-            messages: List of chat messages to summarize
-        
-        Returns:
-            Dict containing summary, key points, and sentiment
-        """
-        try:
-            # Format messages for the prompt
-            formatted_chat = "\n".join([
-                f"{msg['user_id']}: {msg['message']}"
-                for msg in messages
-            ])
-
-            # Create the prompt for summarization
-            prompt = f"""Please analyze the following chat conversation and provide:
-1. A brief summary (2-3 sentences)
-2. Key points discussed
-3. Overall sentiment
-4. Action items (if any)
-
-Conversation:
-{formatted_chat}"""
-
-            # Use the older version's API format
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes conversations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            return {
-                "summary": response['choices'][0]['message']['content'],
-                "message_count": len(messages),
-                "status": "success"
-            }
-            
-        except openai.error.RateLimitError:
-            return {
-                "error": "Rate limit exceeded. Please try again later.",
-                "status": "error"
-            }
-        except openai.error.AuthenticationError:
-            return {
-                "error": "Invalid API key. Please check your OpenAI API key.",
-                "status": "error"
-            }
-        except Exception as e:
-            return {
-                "error": f"An error occurred: {str(e)}",
-                "status": "error"
-            } 
\ No newline at end of file
+        kind = "conversation"
+        windows = pack_windows(formatted_messages, self.window_tokens)
+        while len(windows) > 1:
+            partials = await asyncio.gather(*(
+                self._summarize(kind, window, self.chunk_tokens)
+                for window in windows
+            ))
+            kind = "combine"
+            windows = pack_windows(list(partials), self.window_tokens)
+            if len(windows) == len(partials):
+                # Summaries longer than estimated; pair them so each level shrinks
+                windows = [list(partials[i:i + 2]) for i in range(0, len(partials), 2)]
+        return await self._summarize(kind, windows[0], max_tokens)
+
+    async def summarize_conversation(self, conversation_id: str, max_length: int = 150) -> str:
+        """Summarize a stored conversation in at most ``max_length`` tokens"""
+        messages = await Database.get_conversation(conversation_id, fields=["user_id", "message"])
+        if not messages:
+            raise ValueError(f"No messages found for conversation {conversation_id}")
+        return await self.generate_summary(messages, max_tokens=max_length)
+
+    async def summarize_messages(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        max_length: int = 150
+    ) -> str:
+        """Summarize a conversation from messages the caller already fetched"""
+        if not messages:
+            raise ValueError(f"No messages found for conversation {conversation_id}")
+        return await self.generate_summary(messages, max_tokens=max_length)
@@ -1,113 +1,285 @@
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
-from collections import defaultdict
+from nltk.tag import PerceptronTagger
 import re
+import os
+import time
 import logging
-from typing import List, Dict, Set, Tuple
-from config.database import Database
+from typing import List, Dict, Set, Tuple, Optional
+from config.database import Database, utc_now
+from config.metrics import SUMMARY_STAGE_SECONDS
+from services.summary_cache import summary_cache
+from services.summary_pool import SummaryPool
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Download required NLTK data
-required_packages = ['punkt', 'stopwords', 'wordnet', 'averaged_perceptron_tagger']
-for package in required_packages:
-    try:
-        nltk.data.find(f'tokenizers/{package}' if package == 'punkt' 
-                      else f'taggers/{package}' if 'tagger' in package
-                      else f'corpora/{package}')
-    except LookupError:
-        nltk.download(package)
+# How far back incremental reads overlap the high-water mark, to absorb
+# clock skew between workers generating ObjectIds
+SUMMARY_SETTLE_SECONDS = float(os.getenv("SUMMARY_SETTLE_SECONDS", "10"))
+
+# The only message fields key info extraction reads
+SUMMARY_FIELDS = ['user_id', 'message']
+
+# Messages POS-tagged per pos_tag_sents call, capping memory held for tokens
+SUMMARY_TAG_CHUNK_SIZE = int(os.getenv("SUMMARY_TAG_CHUNK_SIZE", "500"))
+
+# NLTK data the summarizer needs, as (resource path, downloader package).
+# Data is looked up on nltk.data.path, which includes $NLTK_DATA, so a
+# directory bundled into the image works without network access.
+NLTK_RESOURCES = [
+    ('tokenizers/punkt', 'punkt'),
+    ('corpora/stopwords', 'stopwords'),
+    ('corpora/wordnet', 'wordnet'),
+    ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger')
+]
+
+# Whether warmup may download missing NLTK data; requests never download
+NLTK_AUTO_DOWNLOAD = os.getenv("NLTK_AUTO_DOWNLOAD", "false").lower() in ("1", "true", "yes")
+
+def ensure_nltk_resources(download: bool = NLTK_AUTO_DOWNLOAD) -> None:
+    """Check that the NLTK data is installed, optionally downloading what is missing"""
+    missing = []
+    for path, package in NLTK_RESOURCES:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if download and nltk.download(package, quiet=True):
+                continue
+            missing.append(package)
+    if missing:
+        raise LookupError(
+            f"Missing NLTK data: {', '.join(missing)}. Install it with "
+            f"`python -m nltk.downloader {' '.join(missing)}`, point NLTK_DATA at a bundled copy "
+            f"or set NLTK_AUTO_DOWNLOAD=true"
+        )
+
+# Keywords for different categories, matched as plain substrings of the lowercased message
+KEYWORD_CATEGORIES = {
+    'meeting': {'meet', 'meeting', 'dinner', 'lunch', 'coffee', 'restaurant', 'cafe', 'time', 'place', 'location'},
+    'action': {'working', 'finish', 'complete', 'send', 'submit', 'prepare', 'do', 'manage', 'going', 'coming', 'joining'},
+    'status': {'done', 'finished', 'completed', 'ready', 'not yet', 'still', 'worried', 'better', 'good', 'fine', 'nice'},
+    'greeting': {'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'}
+}
+
+# Words that make a status message "doing well" and an action message a
+# confirmation of attendance in the narrative summary
+WELL_WORDS = ('good', 'fine', 'nice')
+ATTEND_WORDS = ('coming', 'going', 'joining')
+
+def _keyword_trie_pattern(keywords: Set[str]) -> str:
+    """Build a regex matching any of ``keywords`` with common prefixes factored out.
+
+    CPython's re tries alternatives one after another, so ``a|b|c`` costs a
+    test per keyword at every position; a trie-shaped pattern needs one
+    character test per position instead.
+    """
+    trie: Dict[str, Dict] = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+# One precompiled pattern per category; a search hit is equivalent to
+# any(keyword in text for keyword in keywords)
+KEYWORD_PATTERNS = {
+    category: re.compile(_keyword_trie_pattern(keywords))
+    for category, keywords in KEYWORD_CATEGORIES.items()
+}
+GREETING_NAME_PATTERN = re.compile(r'hi\s+(\w+)|hello\s+(\w+)|hey\s+(\w+)')
+TIME_PATTERN = re.compile(r'(\d{1,2}(?::\d{2})?\s*(?:am|pm|AM|PM)?)')
+PLACE_PATTERNS = [
+    re.compile(r'(?:at|in)\s+([a-zA-Z\s]+(?:cafe|restaurant|place|location))'),
+    re.compile(r'(?:named|called)\s+([a-zA-Z\s]+(?:cafe|restaurant|place|location))'),
+    re.compile(r'([a-zA-Z\s]+(?:cafe|restaurant|place|location))\s+(?:at|in)')
+]
+
+# Per-process Summarizer used by pool workers
+_worker_summarizer = None
+
+def _init_worker() -> None:
+    """Load NLTK resources once when a pool worker starts"""
+    global _worker_summarizer
+    _worker_summarizer = Summarizer()
+    _worker_summarizer.warmup(download=False)
+
+def _extract_key_info_job(messages: List[Dict], info_doc: Optional[Dict]) -> Dict:
+    """Pool job: extend dumped key info with new messages and dump it again"""
+    summarizer = _worker_summarizer or Summarizer()
+    info = Summarizer._load_key_info(info_doc) if info_doc else None
+    return Summarizer._dump_key_info(summarizer._extract_key_info(messages, info))
+
+summary_pool = SummaryPool(initializer=_init_worker)
 
 class Summarizer:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
-        self.lemmatizer = WordNetLemmatizer()
+    def __init__(self, tag_chunk_size: int = SUMMARY_TAG_CHUNK_SIZE):
+        self.tag_chunk_size = tag_chunk_size
+        # NLTK resources are loaded on first use or by warmup()
+        self._stop_words: Optional[Set[str]] = None
+        self._lemmatizer: Optional[WordNetLemmatizer] = None
+        self._tagger: Optional[PerceptronTagger] = None
+        Database.add_change_listener(summary_cache.invalidate)
+
+    @property
+    def stop_words(self) -> Set[str]:
+        if self._stop_words is None:
+            self._stop_words = set(stopwords.words('english'))
+        return self._stop_words
+
+    @property
+    def lemmatizer(self) -> WordNetLemmatizer:
+        if self._lemmatizer is None:
+            self._lemmatizer = WordNetLemmatizer()
+        return self._lemmatizer
+
+    @property
+    def tagger(self) -> PerceptronTagger:
+        if self._tagger is None:
+            self._tagger = PerceptronTagger()
+        return self._tagger
+
+    def warmup(self, download: bool = NLTK_AUTO_DOWNLOAD) -> float:
+        """Load every NLTK resource up front and return the seconds it took"""
+        start = time.perf_counter()
+        ensure_nltk_resources(download)
+        self.tagger.tag_sents([word_tokenize("warm up the summarizer")])
+        self.stop_words
+        self.lemmatizer.lemmatize("warming")
+        elapsed = time.perf_counter() - start
+        logger.info(f"Summarizer warmed up in {elapsed:.2f}s")
+        return elapsed
         
-    def _extract_key_info(self, messages: List[Dict]) -> Dict:
-        """Extract key information from messages"""
-        info = {
+    @staticmethod
+    def _new_key_info() -> Dict:
+        """Create an empty key information accumulator.
+
+        Only what the narrative summary reads is kept, so the persisted
+        state grows with participants and vocabulary, not with history.
+        """
+        return {
             'participants': set(),
             'topics': set(),
-            'actions': [],
-            'meetings': [],
-            'status': [],
-            'questions': [],
-            'responses': [],
-            'greetings': [],
-            'names': {}  # Store name mappings
+            'names': {},  # Store name mappings
+            'greeted': False,
+            'meeting': None,  # The most recent meeting: user_id, time, place
+            'status_users': [],  # Users who said they are doing well, in order of first mention
+            'action_users': []  # Users who confirmed they will attend, in order of first mention
         }
+
+    @staticmethod
+    def _dump_key_info(info: Dict) -> Dict:
+        """Convert key information into a BSON-friendly document"""
+        doc = dict(info)
+        doc['participants'] = sorted(info['participants'])
+        doc['topics'] = sorted(info['topics'])
+        doc['status_users'] = list(info['status_users'])
+        doc['action_users'] = list(info['action_users'])
+        return doc
+
+    @classmethod
+    def _load_key_info(cls, doc: Dict) -> Dict:
+        """Rebuild key information from a document written by _dump_key_info"""
+        info = cls._new_key_info()
+        info['participants'] = set(doc.get('participants', []))
+        info['topics'] = set(doc.get('topics', []))
+        info['names'] = dict(doc.get('names', {}))
+        if 'greeted' in doc:
+            info['greeted'] = doc['greeted']
+            info['meeting'] = doc['meeting']
+            info['status_users'] = list(doc['status_users'])
+            info['action_users'] = list(doc['action_users'])
+        else:
+            # State saved before key info was compacted holds every matching message
+            info['greeted'] = bool(doc.get('greetings'))
+            meetings = doc.get('meetings')
+            if meetings:
+                meeting = meetings[-1]
+                info['meeting'] = {'user_id': meeting['user_id'], 'time': meeting['time'], 'place': meeting['place']}
+            for user_id, text in doc.get('status', []):
+                cls._add_first(info['status_users'], user_id, text, WELL_WORDS)
+            for user_id, text in doc.get('actions', []):
+                cls._add_first(info['action_users'], user_id, text, ATTEND_WORDS)
+        return info
+
+    @staticmethod
+    def _add_first(users: List[str], user_id: str, text: str, words: Tuple[str, ...]) -> None:
+        """Record ``user_id`` the first time one of their messages contains one of ``words``"""
+        if user_id not in users and any(word in text for word in words):
+            users.append(user_id)
+
+    def _classify(self, text: str) -> Set[str]:
+        """Return the keyword categories with a keyword anywhere in ``text``"""
+        return {category for category, pattern in KEYWORD_PATTERNS.items() if pattern.search(text)}
+
+    def _extract_key_info(self, messages: List[Dict], info: Optional[Dict] = None) -> Dict:
+        """Extract key information from messages, adding to ``info`` if given"""
+        if info is None:
+            info = self._new_key_info()
         
-        # Keywords for different categories
-        meeting_keywords = {'meet', 'meeting', 'dinner', 'lunch', 'coffee', 'restaurant', 'cafe', 'time', 'place', 'location'}
-        action_keywords = {'working', 'finish', 'complete', 'send', 'submit', 'prepare', 'do', 'manage', 'going', 'coming', 'joining'}
-        status_keywords = {'done', 'finished', 'completed', 'ready', 'not yet', 'still', 'worried', 'better', 'good', 'fine', 'nice'}
-        question_keywords = {'how', 'what', 'when', 'where', 'why', 'who', 'which', '?'}
-        greeting_keywords = {'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'}
-        
-        for msg in messages:
-            user_id = msg['user_id']
-            text = msg['message'].lower()
-            words = set(word_tokenize(text))
+        # Work in chunks so tokens for at most tag_chunk_size messages are held at once
+        for chunk_start in range(0, len(messages), self.tag_chunk_size):
+            chunk = messages[chunk_start:chunk_start + self.tag_chunk_size]
+            token_lists = []
+            for msg in chunk:
+                user_id = msg['user_id']
+                text = msg['message'].lower()
+                token_lists.append(word_tokenize(text))
+                categories = self._classify(text)
             
-            # Add participant
-            info['participants'].add(user_id)
+                # Add participant
+                info['participants'].add(user_id)
             
-            # Extract names from greetings
-            if any(keyword in text for keyword in greeting_keywords):
-                name_match = re.search(r'hi\s+(\w+)|hello\s+(\w+)|hey\s+(\w+)', text)
-                if name_match:
-                    name = name_match.group(1) or name_match.group(2) or name_match.group(3)
-                    info['names'][user_id] = name.capitalize()
-                info['greetings'].append((user_id, text))
+                # Extract names from greetings
+                if 'greeting' in categories:
+                    name_match = GREETING_NAME_PATTERN.search(text)
+                    if name_match:
+                        name = name_match.group(1) or name_match.group(2) or name_match.group(3)
+                        info['names'][user_id] = name.capitalize()
+                    info['greeted'] = True
             
-            # Check for meetings/plans
-            if any(keyword in text for keyword in meeting_keywords):
-                # Extract time and place if mentioned
-                time_match = re.search(r'(\d{1,2}(?::\d{2})?\s*(?:am|pm|AM|PM)?)', text)
+                # Check for meetings/plans
+                if 'meeting' in categories:
+                    # Extract time and place if mentioned
+                    time_match = TIME_PATTERN.search(text)
                 
-                # Improved place name extraction
-                place_patterns = [
-                    r'(?:at|in)\s+([a-zA-Z\s]+(?:cafe|restaurant|place|location))',
-                    r'(?:named|called)\s+([a-zA-Z\s]+(?:cafe|restaurant|place|location))',
-                    r'([a-zA-Z\s]+(?:cafe|restaurant|place|location))\s+(?:at|in)'
-                ]
+                    place = None
+                    for pattern in PLACE_PATTERNS:
+                        place_match = pattern.search(text)
+                        if place_match:
+                            place = place_match.group(1).strip()
+                            break
                 
-                place = None
-                for pattern in place_patterns:
-                    place_match = re.search(pattern, text)
-                    if place_match:
-                        place = place_match.group(1).strip()
-                        break
+                    time = time_match.group(1) if time_match else None
                 
-                time = time_match.group(1) if time_match else None
-                
-                info['meetings'].append({
-                    'user_id': user_id,
-                    'time': time,
-                    'place': place,
-                    'text': text
-                })
-            
-            # Check for actions and status
-            if any(keyword in text for keyword in action_keywords):
-                info['actions'].append((user_id, text))
+                    info['meeting'] = {
+                        'user_id': user_id,
+                        'time': time,
+                        'place': place
+                    }
             
-            if any(keyword in text for keyword in status_keywords):
-                info['status'].append((user_id, text))
+                # Check for actions and status
+                if 'action' in categories:
+                    self._add_first(info['action_users'], user_id, text, ATTEND_WORDS)
             
-            # Check for questions and responses
-            if any(keyword in text for keyword in question_keywords) or '?' in text:
-                info['questions'].append((user_id, text))
-            else:
-                info['responses'].append((user_id, text))
-            
-            # Extract potential topics (nouns not in stop words)
-            tokens = nltk.pos_tag(word_tokenize(text))
-            nouns = [word for word, pos in tokens if pos.startswith('NN') and word not in self.stop_words]
-            info['topics'].update(nouns)
+                if 'status' in categories:
+                    self._add_first(info['status_users'], user_id, text, WELL_WORDS)
+
+            # Extract potential topics (nouns not in stop words), tagging the whole chunk in one call
+            for tagged in self.tagger.tag_sents(token_lists):
+                nouns = [word for word, pos in tagged if pos.startswith('NN') and word not in self.stop_words]
+                info['topics'].update(nouns)
         
         return info
 
@@ -120,11 +292,9 @@ class Summarizer:
     def _generate_narrative_summary(self, info: Dict) -> str:
         """Generate a narrative summary from extracted information"""
         summary_parts = []
-        processed_status = set()
-        processed_actions = set()
         
         # Process greetings first
-        if info['greetings']:
+        if info['greeted']:
             participants = list(info['participants'])
             if len(participants) == 2:
                 name1 = self._get_user_name(participants[0], info)
@@ -132,8 +302,8 @@ class Summarizer:
                 summary_parts.append(f"{name1} and {name2} exchanged greetings")
         
         # Process meetings/plans
-        if info['meetings']:
-            meeting = info['meetings'][-1]  # Take the most recent meeting
+        if info['meeting']:
+            meeting = info['meeting']
             meeting_parts = []
             
             if meeting['place']:
@@ -145,18 +315,14 @@ class Summarizer:
                 summary_parts.append(f"They plan to meet {' '.join(meeting_parts)}")
         
         # Process status updates (only once per user)
-        for user_id, text in info['status']:
-            if user_id not in processed_status and ('good' in text or 'fine' in text or 'nice' in text):
-                name = self._get_user_name(user_id, info)
-                summary_parts.append(f"{name} is doing well")
-                processed_status.add(user_id)
+        for user_id in info['status_users']:
+            name = self._get_user_name(user_id, info)
+            summary_parts.append(f"{name} is doing well")
         
         # Process actions (only once per user)
-        for user_id, text in info['actions']:
-            if user_id not in processed_actions and ('coming' in text or 'going' in text or 'joining' in text):
-                name = self._get_user_name(user_id, info)
-                summary_parts.append(f"{name} confirmed they will attend")
-                processed_actions.add(user_id)
+        for user_id in info['action_users']:
+            name = self._get_user_name(user_id, info)
+            summary_parts.append(f"{name} confirmed they will attend")
         
         # Combine the summary parts
         if not summary_parts:
@@ -170,23 +336,105 @@ class Summarizer:
         
         return ' '.join(summary_parts) + '.'
 
+    async def _analyze(self, messages: List[Dict], key_info: Optional[Dict] = None) -> Dict:
+        """Extract key information, in the process pool when it is running"""
+        with SUMMARY_STAGE_SECONDS.labels("extract").time():
+            if summary_pool.started:
+                payload = [{'user_id': msg['user_id'], 'message': msg['message']} for msg in messages]
+                info_doc = await summary_pool.run(
+                    _extract_key_info_job,
+                    payload,
+                    self._dump_key_info(key_info) if key_info is not None else None
+                )
+                return self._load_key_info(info_doc)
+            return self._extract_key_info(messages, key_info)
+
+    async def summarize_messages(
+        self,
+        conversation_id: str,
+        messages: List[Dict],
+        max_sentences: int = 3
+    ) -> str:
+        """Summarize a conversation from messages the caller already fetched.
+
+        Used by batch summarization. The summary cache is consulted with the
+        newest message id as version, but incremental state is not read or
+        written.
+        """
+        if not messages:
+            raise ValueError(f"No messages found for conversation {conversation_id}")
+        version = str(max(msg['_id'] for msg in messages))
+        cached = summary_cache.get(conversation_id, version)
+        if cached is not None:
+            return cached
+        key_info = await self._analyze(messages)
+        with SUMMARY_STAGE_SECONDS.labels("narrative").time():
+            summary = self._generate_narrative_summary(key_info)
+        summary_cache.put(conversation_id, version, summary)
+        return summary
+
     async def summarize_conversation(self, conversation_id: str, max_sentences: int = 3) -> str:
-        """Summarize a conversation using contextual analysis"""
+        """Summarize a conversation using contextual analysis.
+
+        Key information is persisted per conversation together with a
+        high-water mark, so each call only analyzes messages added since the
+        previous one.
+        """
         try:
-            # Get conversation messages
-            messages = await Database.get_conversation(conversation_id)
-            if not messages:
+            # Serve from cache while the conversation is unchanged
+            version = await Database.get_conversation_version(conversation_id)
+            cached = summary_cache.get(conversation_id, version)
+            if cached is not None:
+                logger.info("Served summary from cache")
+                return cached
+
+            with SUMMARY_STAGE_SECONDS.labels("fetch").time():
+                # Load state from the previous run, if any
+                state = await Database.get_summary_state(conversation_id)
+                if state:
+                    key_info = self._load_key_info(state['info'])
+                    last_id = state['last_id']
+                    recent_ids = set(state.get('recent_ids', []))
+                else:
+                    key_info = self._new_key_info()
+                    last_id = None
+                    recent_ids = set()
+
+                # Get only the messages past the high-water mark
+                messages = await Database.get_messages_after(
+                    conversation_id,
+                    last_id,
+                    overlap_seconds=SUMMARY_SETTLE_SECONDS,
+                    fields=SUMMARY_FIELDS
+                )
+            messages = [msg for msg in messages if msg['_id'] not in recent_ids]
+            if not messages and not state:
                 raise ValueError(f"No messages found for conversation {conversation_id}")
-            
-            # Extract key information
-            key_info = self._extract_key_info(messages)
+
+            if messages:
+                # Extract key information from the new messages only
+                key_info = await self._analyze(messages, key_info if state else None)
+
+                # Advance the mark, remembering ids still inside the settle window
+                seen_ids = recent_ids.union(msg['_id'] for msg in messages)
+                last_id = max(seen_ids)
+                cutoff = last_id.generation_time.timestamp() - SUMMARY_SETTLE_SECONDS
+                await Database.save_summary_state(conversation_id, {
+                    'info': self._dump_key_info(key_info),
+                    'last_id': last_id,
+                    'recent_ids': [i for i in seen_ids if i.generation_time.timestamp() >= cutoff],
+                    'message_count': (state or {}).get('message_count', 0) + len(messages),
+                    'updated_at': utc_now()
+                })
             
             # Generate narrative summary
-            summary = self._generate_narrative_summary(key_info)
+            with SUMMARY_STAGE_SECONDS.labels("narrative").time():
+                summary = self._generate_narrative_summary(key_info)
+            summary_cache.put(conversation_id, version, summary)
             
-            logger.info("Successfully generated summary")
+            logger.info(f"Successfully generated summary ({len(messages)} new messages analyzed)")
             return summary
             
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
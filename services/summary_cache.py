@@ -0,0 +1,85 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1024"))
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "300"))
+
+class SummaryCache:
+    """Bounded LRU cache of summaries (or other derived results) with a TTL.
+
+    Entries are keyed by conversation id and carry a version token (the id of
+    the conversation's latest message); a lookup with a different token is a
+    miss, so a stale summary is never served even if an invalidation from
+    another worker was missed.
+    """
+
+    def __init__(self, max_size: int = SUMMARY_CACHE_SIZE, ttl: float = SUMMARY_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[str], Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, conversation_id: str, version: Optional[str]) -> Optional[Any]:
+        """Return the cached summary for this version, or None on a miss"""
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        cached_version, summary, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[conversation_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if cached_version != version:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(conversation_id)
+        self.hits += 1
+        return summary
+
+    def put(self, conversation_id: str, version: Optional[str], summary: Any) -> None:
+        """Store a summary, evicting the least recently used entry if full"""
+        self._entries[conversation_id] = (version, summary, time.monotonic())
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, conversation_id: str) -> None:
+        """Drop the cached summary for a conversation"""
+        if self._entries.pop(conversation_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every cached summary"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+summary_cache = SummaryCache()
@@ -0,0 +1,92 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Callable, Any
+from config.metrics import SUMMARY_POOL_PENDING
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "2"))
+SUMMARY_MAX_PENDING = int(os.getenv("SUMMARY_MAX_PENDING", "32"))
+SUMMARY_MP_START_METHOD = os.getenv("SUMMARY_MP_START_METHOD", "spawn")
+
+class SummarizerBusyError(Exception):
+    """Raised when the summarization queue is full"""
+
+def _ping() -> None:
+    """No-op job used to bring every worker up at start"""
+
+class SummaryPool:
+    """Process pool that keeps CPU-bound summarization off the event loop.
+
+    At most ``max_pending`` jobs may be queued or running at once; further
+    submissions fail fast with SummarizerBusyError instead of piling up.
+    Callers check ``started`` and do the work themselves when the pool is
+    not running.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = SUMMARY_WORKERS,
+        max_pending: int = SUMMARY_MAX_PENDING,
+        initializer: Optional[Callable[[], None]] = None
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+
+    @property
+    def started(self) -> bool:
+        return self.executor is not None
+
+    def start(self) -> None:
+        """Create the worker processes, if configured.
+
+        Workers are spawned and initialized here rather than on the first
+        job, so a failing initializer stops startup instead of breaking the
+        pool under the first request.
+        """
+        if self.executor or self.max_workers < 1:
+            return
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(SUMMARY_MP_START_METHOD),
+            initializer=self.initializer
+        )
+        try:
+            # Back-to-back submissions spawn one process each
+            for future in [executor.submit(_ping) for _ in range(self.max_workers)]:
+                future.result()
+        except Exception:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        self.executor = executor
+        logger.info(f"Started summarization pool with {self.max_workers} workers")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+            logger.info("Stopped summarization pool")
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` in a worker, rejecting the job if the queue is full"""
+        if not self.executor:
+            raise RuntimeError("Summarization pool is not started")
+        if self.pending >= self.max_pending:
+            raise SummarizerBusyError("Summarization queue is full, please retry later")
+
+        self.pending += 1
+        SUMMARY_POOL_PENDING.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            SUMMARY_POOL_PENDING.dec()
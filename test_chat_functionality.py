@@ -1,7 +1,8 @@
 import asyncio
 import logging
-from datetime import datetime
-from config.database import Database
+from datetime import timedelta
+from config.database import Database, utc_now
+from config.mongo_backend import MongoBackend, timestamp_range
 from services.summarizer import Summarizer
 
 # Set up logging
@@ -24,25 +25,25 @@ async def test_chat_functionality():
                 "user_id": user_id,
                 "message": "Hello, I'm interested in learning about AI.",
                 "conversation_id": conversation_id,
-                "timestamp": datetime.now()
+                "timestamp": utc_now()
             },
             {
                 "user_id": "assistant",
                 "message": "AI is a fascinating field! It involves creating intelligent machines that can perform tasks that typically require human intelligence.",
                 "conversation_id": conversation_id,
-                "timestamp": datetime.now()
+                "timestamp": utc_now()
             },
             {
                 "user_id": user_id,
                 "message": "What are some practical applications of AI?",
                 "conversation_id": conversation_id,
-                "timestamp": datetime.now()
+                "timestamp": utc_now()
             },
             {
                 "user_id": "assistant",
                 "message": "AI has many practical applications including natural language processing, computer vision, recommendation systems, and autonomous vehicles.",
                 "conversation_id": conversation_id,
-                "timestamp": datetime.now()
+                "timestamp": utc_now()
             }
         ]
         
@@ -56,6 +57,25 @@ async def test_chat_functionality():
         messages = await Database.get_conversation(conversation_id)
         logger.info(f"Retrieved {len(messages)} messages")
         
+        # Check that time-range reads are served by the compound indexes
+        logger.info("Checking query plans for time-range reads...")
+        collection = Database.backend.messages
+        since = utc_now() - timedelta(days=1)
+        time_sort = [("timestamp", 1), ("_id", 1)]
+        plans = {
+            "user_id_1_timestamp_1__id_1": await collection.find(
+                MongoBackend.user_messages_query(user_id, since=since)
+            ).sort(time_sort).explain(),
+            "conversation_id_1_timestamp_1__id_1": await collection.find(
+                {"$and": [{"conversation_id": conversation_id}, timestamp_range(since, None)]}
+            ).sort(time_sort).explain()
+        }
+        for index_name, plan in plans.items():
+            winning_plan = str(plan["queryPlanner"]["winningPlan"])
+            assert "COLLSCAN" not in winning_plan, f"Time-range read fell back to a collection scan: {winning_plan}"
+            assert index_name in winning_plan, f"Expected {index_name} in plan: {winning_plan}"
+        logger.info("Time-range reads use the compound indexes")
+        
         # Test summarization
         logger.info("Testing summarization...")
         summarizer = Summarizer()
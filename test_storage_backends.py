@@ -0,0 +1,116 @@
+import os
+import asyncio
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from bson import ObjectId
+from config.database import Database, UnsupportedByBackend
+from config.storage import MemoryBackend
+from config.sqlite_backend import SQLiteBackend
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+START = datetime(2024, 1, 1)
+
+def make_messages(count):
+    """Messages spread over 5 conversations and 3 users, with colliding timestamps"""
+    return [
+        {
+            "user_id": f"user{i % 3}",
+            "message": f"message {i}",
+            "conversation_id": f"conv{i % 5}",
+            "timestamp": START + timedelta(seconds=(i * 7) % 50)
+        }
+        for i in range(count)
+    ]
+
+async def walk_pages(conversation_id, direction):
+    """Read a conversation page by page, then back again from the last page"""
+    forward, backward = [], []
+    after = None
+    while True:
+        messages, next_cursor, prev_cursor = await Database.get_conversation_page(
+            conversation_id, limit=4, after=after, direction=direction
+        )
+        forward.extend(msg["message"] for msg in messages)
+        if not next_cursor:
+            break
+        after = next_cursor
+    before = prev_cursor
+    while before:
+        messages, _, before = await Database.get_conversation_page(
+            conversation_id, limit=4, before=before, direction=direction
+        )
+        backward[:0] = [msg["message"] for msg in messages]
+    return forward, backward
+
+async def check_backend(backend):
+    await Database.use_backend(backend)
+    try:
+        results = await Database.store_messages(make_messages(100))
+        assert all(error is None for _, error in results)
+        message_id = await Database.store_message(
+            {"user_id": "user9", "message": "hello", "conversation_id": "conv9", "timestamp": START}
+        )
+
+        # Pages follow (timestamp, _id) order in both directions
+        stored = await Database.get_conversation("conv1")
+        expected = [msg["message"] for msg in sorted(stored, key=lambda msg: (msg["timestamp"], msg["_id"]))]
+        forward, backward = await walk_pages("conv1", "asc")
+        assert forward == expected, forward
+        assert backward == expected[:-(len(expected) % 4 or 4)], backward
+        forward, _ = await walk_pages("conv1", "desc")
+        assert forward == expected[::-1], forward
+
+        # Time ranges are since <= timestamp < until
+        since, until = START + timedelta(seconds=10), START + timedelta(seconds=30)
+        history = await Database.get_user_messages("user1", since=since, until=until, order="desc")
+        assert history and all(since <= msg["timestamp"] < until for msg in history)
+        assert history == sorted(history, key=lambda msg: (msg["timestamp"], msg["_id"]), reverse=True)
+        streamed = [msg async for msg in Database.iter_user_messages("user1", since=since, until=until, order="desc")]
+        assert streamed == history
+
+        # Incremental reads past the newest message, and summary state round trips
+        version = await Database.get_conversation_version("conv2")
+        assert len(await Database.get_messages_after("conv2", None)) == 20
+        assert await Database.get_messages_after("conv2", ObjectId(version)) == []
+        await Database.save_summary_state("conv2", {"last_id": ObjectId(version), "updated_at": START})
+        state = await Database.get_summary_state("conv2")
+        assert state["last_id"] == ObjectId(version) and state["updated_at"] == START
+
+        # Projections, grouped reads and lookups by id
+        projected = [msg async for msg in Database.iter_messages(fields=["message"])]
+        assert len(projected) == 101 and all(set(msg) == {"_id", "message"} for msg in projected)
+        grouped = [(conversation_id, len(messages)) async for conversation_id, messages in Database.iter_conversations(["conv4", "conv0", "missing"])]
+        assert grouped == [("conv0", 20), ("conv4", 20)], grouped
+        found = await Database.get_messages_by_ids([ObjectId(message_id), ObjectId(results[0][0])])
+        assert [msg["message"] for msg in found] == ["hello", "message 0"]
+
+        # Deleting removes messages from every view
+        assert await Database.delete_conversation("conv1")
+        assert not await Database.delete_conversation("conv1")
+        assert await Database.get_conversation("conv1") == []
+        assert await Database.get_summary_state("conv1") is None
+        assert all(msg["conversation_id"] != "conv1" for msg in await Database.get_user_messages("user1"))
+
+        # Features built on MongoDB aggregations are reported as unsupported
+        assert not Database.supports("get_conversation_stats")
+        try:
+            await Database.get_conversation_stats("conv2")
+            assert False, "stats should require MongoDB"
+        except UnsupportedByBackend:
+            pass
+        logger.info(f"✅ {type(backend).__name__} passed")
+    finally:
+        await Database.close_db()
+
+async def test_storage_backends():
+    await check_backend(MemoryBackend())
+    with tempfile.TemporaryDirectory() as directory:
+        await check_backend(SQLiteBackend(os.path.join(directory, "chat.db")))
+    logger.info("✅ All tests completed successfully!")
+
+if __name__ == "__main__":
+    asyncio.run(test_storage_backends())
@@ -0,0 +1,161 @@
+import os
+import json
+import asyncio
+import logging
+import httpx
+import tempfile
+import itertools
+from openai import AsyncOpenAI
+
+# The service never touches the database here
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+
+from services.summarization import SummarizationService
+from services.summary_pool import SummarizerBusyError
+from services.completion_cache import CompletionCache
+
+# Completion caches live here instead of the working directory
+CACHE_DIR = tempfile.TemporaryDirectory()
+_cache_numbers = itertools.count()
+
+def cache_path():
+    """A fresh completion cache file inside CACHE_DIR"""
+    return os.path.join(CACHE_DIR.name, f"completions-{next(_cache_numbers)}.db")
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MESSAGES = [
+    {"user_id": "user1", "message": "Can we meet tomorrow at 3pm?"},
+    {"user_id": "user2", "message": "Sure, see you at the office."},
+]
+
+def completion(content):
+    """Build a chat completion response body"""
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    }
+
+def fake_service(handler, **kwargs):
+    """SummarizationService whose client answers from ``handler`` instead of the network"""
+    client = AsyncOpenAI(
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    kwargs.setdefault("backoff_base", 0.01)
+    kwargs.setdefault("cache", CompletionCache(path=cache_path()))
+    return SummarizationService(client=client, **kwargs)
+
+async def test_summarization_service():
+    # Successful completion carries the formatted conversation
+    async def ok(request):
+        body = json.loads(request.content)
+        assert "user1: Can we meet tomorrow at 3pm?" in body["messages"][1]["content"]
+        assert body["max_tokens"] == 60
+        return httpx.Response(200, json=completion("  They agreed to meet.  "))
+    summary = await fake_service(ok).generate_summary(MESSAGES, max_tokens=60)
+    assert summary == "They agreed to meet.", summary
+    logger.info("Summary request succeeded")
+
+    # Rate limits are retried with backoff
+    calls = []
+    async def flaky(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, json=completion("Done."))
+    summary = await fake_service(flaky).generate_summary(MESSAGES)
+    assert summary == "Done." and len(calls) == 3, (summary, len(calls))
+    logger.info("Rate-limited request retried")
+
+    # Exhausted retries on rate limits surface as a busy error
+    async def limited(request):
+        return httpx.Response(429, json={"error": {"message": "slow down"}})
+    try:
+        await fake_service(limited, max_retries=2).generate_summary(MESSAGES)
+        raise AssertionError("Expected SummarizerBusyError")
+    except SummarizerBusyError:
+        logger.info("Exhausted retries raise SummarizerBusyError")
+
+    # The semaphore caps requests in flight
+    in_flight = 0
+    peak = 0
+    async def slow(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return httpx.Response(200, json=completion("ok"))
+    service = fake_service(slow, max_concurrency=2)
+    await asyncio.gather(*(service.generate_summary(MESSAGES) for _ in range(6)))
+    assert peak == 2, peak
+    logger.info("Concurrency limited to 2 requests in flight")
+
+    # Long conversations are reduced hierarchically, and appending only
+    # re-summarizes the tail window and the summaries above it
+    prompts = []
+    async def echo(request):
+        body = json.loads(request.content)
+        prompts.append(body["messages"][1]["content"])
+        return httpx.Response(200, json=completion(f"part {len(prompts)}"))
+    service = fake_service(echo, window_tokens=40, chunk_tokens=10)
+    conversation = [{"user_id": "user1", "message": f"message number {i} " * 3} for i in range(40)]
+    await service.generate_summary(conversation)
+    cold_calls = len(prompts)
+    assert cold_calls > 2 and prompts[-1].startswith("These are summaries"), prompts[-1]
+    prompts.clear()
+    await service.generate_summary(conversation)
+    assert not prompts, len(prompts)
+    conversation.append({"user_id": "user2", "message": "one more"})
+    await service.generate_summary(conversation)
+    assert 0 < len(prompts) < cold_calls / 2, (len(prompts), cold_calls)
+    logger.info(f"Map-reduce: {cold_calls} requests cold, {len(prompts)} after appending a message")
+
+    # Cached completions survive a restart and are shared through the file
+    prompts.clear()
+    restarted = fake_service(echo, window_tokens=40, chunk_tokens=10, cache=CompletionCache(path=service.cache.path))
+    await restarted.generate_summary(conversation)
+    assert not prompts, len(prompts)
+    stats = await restarted.cache.stats()
+    assert stats["hits"] > 0 and stats["size"] == stats["misses"], stats
+    logger.info(f"Completion cache: {stats['hits']} hits, {stats['misses']} misses")
+
+    # The least recently used entries are evicted beyond max_size, and
+    # entries past their TTL are misses
+    cache = CompletionCache(path=cache_path(), max_size=2)
+    for key in ("a", "b", "c"):
+        await cache.put(key, key)
+    assert await cache.get("a") is None and await cache.get("c") == "c"
+    cache.ttl = -1
+    assert await cache.get("c") is None
+    stats = await cache.stats()
+    assert stats["evictions"] == 1 and stats["expirations"] == 1, stats
+    logger.info("Completion cache evicts by LRU and expires by TTL")
+
+    # Without an injected client the service builds its own, which must work
+    # with the installed httpx
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    service = SummarizationService(cache=CompletionCache(path=cache_path()))
+    assert isinstance(service.client, AsyncOpenAI) and service.client.max_retries == 0
+    await service.client.close()
+    logger.info("Default OpenAI client can be created")
+
+    logger.info("✅ All tests completed successfully!")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(test_summarization_service())
+    finally:
+        CACHE_DIR.cleanup()
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, WriteConcernError, WriteError
+from config.mongo_backend import WriteBatcher
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FailingCollection:
+    """Stand-in for a messages collection whose insert_many raises a BulkWriteError"""
+
+    def __init__(self, details):
+        self.details = details
+
+    async def insert_many(self, documents, ordered=True):
+        for doc in documents:
+            doc.setdefault("_id", ObjectId())
+        raise BulkWriteError(self.details)
+
+async def submit_all(batcher, count):
+    return await asyncio.gather(
+        *(batcher.submit({"message": f"message {i}"}) for i in range(count)),
+        return_exceptions=True
+    )
+
+async def test_write_batcher():
+    # Per-document write errors fail only their own callers
+    batcher = WriteBatcher(FailingCollection({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}]}), max_size=3)
+    results = await submit_all(batcher, 3)
+    assert isinstance(results[0], ObjectId) and isinstance(results[2], ObjectId), results
+    assert isinstance(results[1], WriteError), results
+
+    # A write concern error leaves the whole batch unacknowledged
+    batcher = WriteBatcher(FailingCollection({
+        "writeErrors": [],
+        "writeConcernErrors": [{"code": 64, "errmsg": "waiting for replication timed out"}]
+    }), max_size=3)
+    results = await submit_all(batcher, 3)
+    assert all(isinstance(result, WriteConcernError) for result in results), results
+    await batcher.close()
+    logger.info("✅ All tests completed successfully!")
+
+if __name__ == "__main__":
+    asyncio.run(test_write_batcher())